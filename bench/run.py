@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bench.stubs import StubServer  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+NAMES = ["Anna", "Ben", "Carlos", "Dana", "Elif", "Farah", "Gus", "Hana", "Ivan", "Jade", "Kofi", "Lena", "Mateo", "Nia", "Omar", "Priya"]
+CITIES = [("Fort Worth", "Texas"), ("Austin", "Texas"), ("Denver", "Colorado"), ("Portland", "Oregon"), ("Boston", "Massachusetts")]
+
+
+def pick_name(distinct):
+    return f"{random.choice(NAMES)}{random.randrange(distinct)}"
+
+
+def pick_city(distinct):
+    city, state = random.choice(CITIES)
+    return {"city": f"{city}{random.randrange(distinct) or ''}", "state-country": state}
+
+
+# Each scenario is (name, method, path, function(distinct) -> keyword arguments for requests)
+SCENARIOS = [
+    ("home", "GET", "/", lambda distinct: {}),
+    ("projects", "GET", "/projects", lambda distinct: {}),
+    ("weather-forecaster-page", "GET", "/projects/weather-forecaster", lambda distinct: {}),
+    ("contact", "POST", "/thank-you", lambda distinct: {"data": {"fullName": "Bench Mark", "email": "bench@example.com", "phoneNumber": "555-0100", "subject": "Benchmark", "message": "Hello"}}),
+    ("band-name-generator", "POST", "/projects/band-name-generator", lambda distinct: {"data": {"cityName": "fort worth", "petName": "rex"}}),
+    ("tip-calculator", "POST", "/projects/tip-calculator", lambda distinct: {"data": {"bill": "120.50", "tip": "15", "people": "3"}}),
+    ("bmi-calculator", "POST", "/projects/bmi-calculator", lambda distinct: {"data": {"heightFeet": "5", "heightInches": "10", "weight": "170"}}),
+    ("life-in-weeks", "POST", "/projects/life-in-weeks", lambda distinct: {"data": {"ageYears": "30"}}),
+    ("leap-year-checker", "POST", "/projects/leap-year-checker", lambda distinct: {"data": {"year": str(random.randrange(1600, 2400))}}),
+    ("heads-or-tails", "POST", "/projects/heads-or-tails", lambda distinct: {}),
+    ("rock-paper-scissors", "POST", "/projects/rock-paper-scissors", lambda distinct: {"data": {"choice": random.choice(["Rock", "Paper", "Scissors"])}}),
+    ("gender-guesser", "POST", "/projects/gender-guesser", lambda distinct: {"data": {"name": pick_name(distinct)}}),
+    ("age-guesser", "POST", "/projects/age-guesser", lambda distinct: {"data": {"name": pick_name(distinct)}}),
+    ("city-coordinates-finder", "POST", "/projects/city-coordinates-finder", lambda distinct: {"data": pick_city(distinct)}),
+    ("weather-forecaster", "POST", "/projects/weather-forecaster", lambda distinct: {"data": pick_city(distinct)}),
+    ("workout-calculator", "POST", "/projects/workout-calculator", lambda distinct: {"data": {"weight": "170", "heightFeet": "5", "heightInches": "10", "age": "30", "query": f"ran {random.randrange(distinct) + 1} miles"}}),
+    ("name-insights", "POST", "/api/name-insights", lambda distinct: {"json": {"names": [pick_name(distinct) for _ in range(25)]}}),
+    ("simulate-rock-paper-scissors", "POST", "/api/simulate/rock-paper-scissors", lambda distinct: {"json": {"rounds": 1_000_000, "player": {"type": "weighted", "weights": {"Rock": 2, "Paper": 1}}}}),
+    ("bulk-bmi-calculator", "POST", "/api/bulk/bmi-calculator", lambda distinct: {"json": {"columns": {"height_feet": [5] * 1000, "height_inches": list(range(1000)), "weight": [170] * 1000}}}),
+    ("bulk-tip-calculator-csv", "POST", "/api/bulk/tip-calculator", lambda distinct: {
+        "data": "bill,tip,people\n" + "".join(f"{20 + row},{row % 30},{row % 6 + 1}\n" for row in range(1000)),
+        "headers": {"Content-Type": "text/csv"}
+    }),
+    ("bulk-workout-log", "POST", "/api/bulk/workout-log", lambda distinct: {
+        "data": "weight,height_feet,height_inches,age,query\n" + "".join(f"{150 + row % 5},5,10,30,ran {row % distinct + 1} miles\n" for row in range(50)),
+        "headers": {"Content-Type": "text/csv"}
+    })
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def worker_pids(master_pid):
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as file:
+            return [int(pid) for pid in file.read().split()]
+    except OSError:
+        return []
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def drive(base_url, scenario, concurrency, duration, distinct):
+    """
+    Runs one scenario with `concurrency` closed-loop clients for `duration` seconds.
+    """
+    name, method, path, make_request = scenario
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, timeout=130, **make_request(distinct))
+                response.content
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            local_latencies.append(time.perf_counter() - started)
+            local_errors += failed
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 2) if latencies else None,
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 2) if latencies else None,
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 2) if latencies else None
+    }
+
+
+def start_app(port, stubs, smtp_sink, workers, worker_mode, state_dir):
+    environment = dict(os.environ)
+    environment.update(stubs.endpoint_environment())
+    environment.update({
+        "SMTP_HOST": smtp_sink.server_address[0],
+        "SMTP_PORT": str(smtp_sink.server_address[1]),
+        "SMTP_STARTTLS": "false",
+        "MY_EMAIL": "bench@example.com",
+        "MY_PASSWORD": "",
+        "OUTBOX_SPOOL_PATH": os.path.join(state_dir, "outbox.sqlite3"),
+        # Every piece of app state lives in the run's own directory, so nothing left in instance/ changes the results
+        "UPSTREAM_CACHE_PATH": os.path.join(state_dir, "upstream-cache.sqlite3"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(state_dir, "metrics"),
+        "JINJA_CACHE_DIR": os.path.join(state_dir, "jinja-cache"),
+        "PROFILE_DIR": os.path.join(state_dir, "profiles"),
+        "PROFILE_SAMPLE_EVERY": "0",
+        "PROFILE_SECRET": "",
+        # No index, so city lookups always go through the geocoding stand-in
+        "GAZETTEER_INDEX_PATH": os.path.join(state_dir, "gazetteer.idx"),
+        "WORKER_MODE": worker_mode,
+        "WEB_CONCURRENCY": str(workers)
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=REPO_DIR,
+        env=environment
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(base_url + "/", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 60 seconds")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as file:
+        baseline = {(row["scenario"], row["concurrency"]): row for row in json.load(file)["results"]}
+    print(f"\n{'scenario':<28}{'conc':>5}{'rps':>10}{'Δrps':>9}{'p95 ms':>10}{'Δp95':>9}")
+    for row in results:
+        before = baseline.get((row["scenario"], row["concurrency"]))
+        rps_change = p95_change = ""
+        if before and before["requests_per_second"]:
+            rps_change = f"{100 * (row['requests_per_second'] / before['requests_per_second'] - 1):+.1f}%"
+        if before and before["p95_ms"] and row["p95_ms"] is not None:
+            p95_change = f"{100 * (row['p95_ms'] / before['p95_ms'] - 1):+.1f}%"
+        print(f"{row['scenario']:<28}{row['concurrency']:>5}{row['requests_per_second']:>10}{rps_change:>9}{row['p95_ms'] or '':>10}{p95_change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test every route under gunicorn against local upstream stand-ins.")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario and concurrency level")
+    parser.add_argument("--scenarios", default="", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--worker-mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream-latency-ms", type=float, default=80)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=20)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--distinct", type=int, default=500, help="distinct inputs per scenario (controls cache hit rate)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "bench", "results", "latest.json"))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    wanted = {name for name in args.scenarios.split(",") if name}
+    scenarios = [scenario for scenario in SCENARIOS if not wanted or scenario[0] in wanted]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    stubs = StubServer(latency=args.upstream_latency_ms / 1000, jitter=args.upstream_jitter_ms / 1000, error_rate=args.upstream_error_rate).start()
+    smtp_sink = SMTPSink(port=0)
+    threading.Thread(target=smtp_sink.serve_forever, daemon=True).start()
+
+    results = []
+    memory = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        process, base_url = start_app(args.port, stubs, smtp_sink, args.workers, args.worker_mode, state_dir)
+        try:
+            for scenario in scenarios:
+                for level in levels:
+                    row = drive(base_url, scenario, level, args.duration, args.distinct)
+                    row["worker_rss_mb"] = [rss_mb(pid) for pid in worker_pids(process.pid)]
+                    results.append(row)
+                    print(f"{row['scenario']:<28} c={level:<4} {row['requests_per_second']:>9} req/s  "
+                          f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  errors {row['errors']}", flush=True)
+            memory = {str(pid): rss_mb(pid) for pid in worker_pids(process.pid)}
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "settings": vars(args),
+            "emails_received": smtp_sink.messages_received
+        },
+        "results": results,
+        "final_worker_rss_mb": memory
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
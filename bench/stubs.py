@@ -0,0 +1,123 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Path each stand-in answers on; the benchmark points the *_ENDPOINT constants at these
+STUB_PATHS = {
+    "GENDERIZE_API_ENDPOINT": "/genderize",
+    "AGEIFY_API_ENDPOINT": "/agify",
+    "GEOCODING_API_ENDPOINT": "/geo/1.0/direct",
+    "OPENWEATHERMAP_API_ENDPOINT": "/data/2.5/forecast",
+    "NUTRITIONIX_ENDPOINT": "/v2/natural/exercise"
+}
+
+
+def genderize(query, body):
+    names = query.get("name[]") or query.get("name", ["unknown"])
+    records = [{"count": 1000, "name": name, "gender": random.choice(["male", "female"]), "probability": 0.97} for name in names]
+    return records if "name[]" in query else records[0]
+
+
+def agify(query, body):
+    names = query.get("name[]") or query.get("name", ["unknown"])
+    records = [{"count": 1000, "name": name, "age": 20 + len(name) * 3} for name in names]
+    return records if "name[]" in query else records[0]
+
+
+def geocode(query, body):
+    city, _, region = query.get("q", [""])[0].partition(",")
+    return [{"name": city.strip().title(), "state": region.strip().title(), "country": "US", "lat": 32.7555, "lon": -97.3308}]
+
+
+def forecast(query, body):
+    start = (int(time.time()) // 10800 + 1) * 10800
+    return {
+        "city": {"timezone": -18000},
+        "list": [
+            {
+                "dt": start + index * 10800,
+                "weather": [{"main": "Clear", "description": "clear sky"}],
+                "main": {"temp": 70 + index, "feels_like": 69 + index, "temp_min": 65, "temp_max": 75, "humidity": 40},
+                "wind": {"speed": 5.5}
+            }
+            for index in range(int(query.get("cnt", ["8"])[0]))
+        ]
+    }
+
+
+def exercise(query, body):
+    activities = [activity.strip() for activity in str(body.get("query", "")).split(" and ") if activity.strip()]
+    return {"exercises": [{"name": activity, "nf_calories": 250.5, "duration_min": 30, "met": 8} for activity in activities]}
+
+
+HANDLERS = {
+    STUB_PATHS["GENDERIZE_API_ENDPOINT"]: genderize,
+    STUB_PATHS["AGEIFY_API_ENDPOINT"]: agify,
+    STUB_PATHS["GEOCODING_API_ENDPOINT"]: geocode,
+    STUB_PATHS["OPENWEATHERMAP_API_ENDPOINT"]: forecast,
+    STUB_PATHS["NUTRITIONIX_ENDPOINT"]: exercise
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_stub(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        handler = HANDLERS.get(url.path)
+        server = self.server
+        delay = max(0.0, random.gauss(server.latency, server.jitter)) if server.jitter else server.latency
+        time.sleep(delay)
+        if handler is None:
+            status, payload = 404, {"error": "not found"}
+        elif random.random() < server.error_rate:
+            status, payload = 503, {"error": "injected failure"}
+        else:
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+            except ValueError:
+                body = {}
+            status, payload = 200, handler(parse_qs(url.query), body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = handle_stub
+    do_POST = handle_stub
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    One HTTP server standing in for genderize, agify, OpenWeatherMap and Nutritionix,
+    with configurable latency (seconds, optional Gaussian jitter) and injected 503 errors.
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.0, error_rate=0.0):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoint_environment(self):
+        return {name: self.base_url + path for name, path in STUB_PATHS.items()}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="upstream-stubs", daemon=True).start()
+        return self
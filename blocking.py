@@ -0,0 +1,21 @@
+import sys
+
+
+def gevent_patched():
+    """
+    Tells whether gevent has monkey-patched threading, i.e. we're running in an async (gevent) worker.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def run_blocking(function, *args, **kwargs):
+    """
+    Runs a call that blocks without yielding (SQLite queries and their busy waits, NumPy number crunching).
+    In gevent workers it runs on the hub's native thread pool, so only the calling greenlet waits
+    instead of every request in the worker; otherwise it is just called.
+    """
+    if gevent_patched():
+        import gevent
+        return gevent.get_hub().threadpool.apply(function, args, kwargs)
+    return function(*args, **kwargs)
@@ -0,0 +1,107 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from PIL import Image
+
+try:
+    import pillow_avif  # noqa: F401 (registers the AVIF encoder with Pillow)
+except ImportError:
+    pillow_avif = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIRNAME = "dist"
+MANIFEST_FILENAME = "manifest.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".ico")
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_QUALITY = {"webp": 80, "avif": 55}
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def precompress(path):
+    """
+    Writes .gz and (when brotli is installed) .br siblings of a text asset.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(f"{path}.gz", "wb") as file:
+        file.write(gzip.compress(data, compresslevel=9))
+    if brotli is not None:
+        with open(f"{path}.br", "wb") as file:
+            file.write(brotli.compress(data, quality=11))
+
+
+def image_variants(source_path, dist_path, relative_stem):
+    """
+    Writes resized WebP and AVIF copies of an image and returns {format: [[url path, width], ...]}.
+    Only widths smaller than the original are produced, plus one at the original width.
+    """
+    variants = {}
+    formats = ["webp"] + (["avif"] if "AVIF" in Image.SAVE else [])
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        widths = sorted({width for width in IMAGE_WIDTHS if width < image.width} | {image.width})
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for image_format in formats:
+                filename = f"{os.path.basename(dist_path)}.{width}w.{image_format}"
+                resized.save(os.path.join(os.path.dirname(dist_path), filename), format=image_format.upper(), quality=IMAGE_QUALITY[image_format])
+                variants.setdefault(image_format, []).append([f"{DIST_DIRNAME}/{relative_stem}.{width}w.{image_format}", width])
+    return variants
+
+
+def build(static_dir=STATIC_DIR):
+    """
+    Fingerprints every file under static/ into static/dist/ and writes static/dist/manifest.json.
+    - files: original path -> content-hashed path, used to rewrite url_for('static', ...) output.
+    - images: original path -> resized WebP/AVIF variants for srcset.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    manifest = {"files": {}, "images": {}}
+    for directory, subdirectories, filenames in os.walk(static_dir):
+        if os.path.abspath(directory) == os.path.abspath(static_dir) and DIST_DIRNAME in subdirectories:
+            subdirectories.remove(DIST_DIRNAME)
+        for filename in sorted(filenames):
+            source_path = os.path.join(directory, filename)
+            relative_path = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+            stem, extension = os.path.splitext(relative_path)
+            fingerprinted = f"{stem}.{content_hash(source_path)}{extension}"
+            dist_path = os.path.join(dist_dir, fingerprinted)
+            os.makedirs(os.path.dirname(dist_path), exist_ok=True)
+            shutil.copy2(source_path, dist_path)
+            manifest["files"][relative_path] = f"{DIST_DIRNAME}/{fingerprinted}"
+            if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+                precompress(dist_path)
+            elif extension.lower() in IMAGE_EXTENSIONS:
+                manifest["images"][relative_path] = image_variants(source_path, dist_path, fingerprinted)
+    with open(os.path.join(dist_dir, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint, resize and precompress static assets into static/dist.")
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    args = parser.parse_args()
+    manifest = build(args.static_dir)
+    print(f"Fingerprinted {len(manifest['files'])} files and {len(manifest['images'])} images into {os.path.join(args.static_dir, DIST_DIRNAME)}")
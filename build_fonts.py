@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import re
+import urllib.request
+import xml.etree.ElementTree as ElementTree
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    subset = None
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+TEMPLATE_DIR = os.path.join(ROOT_DIR, "templates")
+# Checked before the cache and the network, so a build can run fully offline
+VENDOR_DIR = os.path.join(ROOT_DIR, "vendor")
+CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "portfolio-assets"))
+FONTS_DIRNAME = "fonts"
+ICONS_DIRNAME = "icons"
+FONTS_MANIFEST_FILENAME = "fonts.json"
+SPRITE_FILENAME = "sprite.svg"
+GOOGLE_FONTS_URL = "https://raw.githubusercontent.com/google/fonts/main/ofl"
+
+# Only the weights style.css asks for: 400 body text, 600 buttons, 700 headings, 800 the logo; no italics anywhere
+FONTS = [
+    {"family": "Poppins", "weight": 400, "source": "Poppins-Regular.ttf", "url": f"{GOOGLE_FONTS_URL}/poppins/Poppins-Regular.ttf", "preload": True},
+    {"family": "Poppins", "weight": 600, "source": "Poppins-SemiBold.ttf", "url": f"{GOOGLE_FONTS_URL}/poppins/Poppins-SemiBold.ttf", "preload": False},
+    {"family": "Poppins", "weight": 700, "source": "Poppins-Bold.ttf", "url": f"{GOOGLE_FONTS_URL}/poppins/Poppins-Bold.ttf", "preload": False},
+    {"family": "Poppins", "weight": 800, "source": "Poppins-ExtraBold.ttf", "url": f"{GOOGLE_FONTS_URL}/poppins/Poppins-ExtraBold.ttf", "preload": True},
+    # Montserrat only ships as a variable font; it is pinned to the one weight the paragraphs use
+    {"family": "Montserrat", "weight": 400, "source": "Montserrat[wght].ttf", "url": f"{GOOGLE_FONTS_URL}/montserrat/Montserrat%5Bwght%5D.ttf", "preload": True}
+]
+
+# Icons the templates use, by the id they get in the sprite
+ICONS = {
+    "bxl-github": "https://unpkg.com/boxicons@2.1.4/svg/logos/bxl-github.svg",
+    "bxl-facebook-circle": "https://unpkg.com/boxicons@2.1.4/svg/logos/bxl-facebook-circle.svg",
+    "bxl-linkedin-square": "https://unpkg.com/boxicons@2.1.4/svg/logos/bxl-linkedin-square.svg",
+    "bxl-twitter": "https://unpkg.com/boxicons@2.1.4/svg/logos/bxl-twitter.svg",
+    "fa-bars": "https://unpkg.com/@fortawesome/fontawesome-free@6.5.2/svgs/solid/bars.svg"
+}
+ICON_LICENSES = "Boxicons (MIT, boxicons.com) and Font Awesome Free (CC BY 4.0, fontawesome.com/license/free)"
+
+# Google Fonts' "latin" subset, so names and cities coming back from the APIs still render in the web font
+LATIN_RANGES = [
+    (0x0000, 0x00FF), (0x0131, 0x0131), (0x0152, 0x0153), (0x02BB, 0x02BC), (0x02C6, 0x02C6), (0x02DA, 0x02DA),
+    (0x02DC, 0x02DC), (0x0304, 0x0304), (0x0308, 0x0308), (0x0329, 0x0329), (0x2000, 0x206F), (0x2074, 0x2074),
+    (0x20AC, 0x20AC), (0x2122, 0x2122), (0x2191, 0x2191), (0x2193, 0x2193), (0x2212, 0x2212), (0x2215, 0x2215),
+    (0xFEFF, 0xFEFF), (0xFFFD, 0xFFFD)
+]
+
+
+def fetch_source(subdirectory, filename, url):
+    """
+    Returns a local path for a source file: the vendored copy, else the build cache, else a fresh download into the cache.
+    """
+    vendored = os.path.join(VENDOR_DIR, subdirectory, filename)
+    if os.path.exists(vendored):
+        return vendored
+    cached = os.path.join(CACHE_DIR, subdirectory, filename)
+    if not os.path.exists(cached):
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response, open(cached + ".tmp", "wb") as file:
+            file.write(response.read())
+        os.replace(cached + ".tmp", cached)
+    return cached
+
+
+def template_codepoints(template_dir=TEMPLATE_DIR):
+    """
+    Returns the characters used in the templates' text, outside Jinja tags and HTML markup.
+    """
+    codepoints = set()
+    for directory, _, filenames in os.walk(template_dir):
+        for filename in filenames:
+            with open(os.path.join(directory, filename), encoding="utf-8") as file:
+                text = file.read()
+            text = re.sub(r"{[{%#].*?[}%#]}|<[^>]*>", " ", text, flags=re.DOTALL)
+            codepoints.update(ord(character) for character in text if character.isprintable())
+    return codepoints
+
+
+def unicode_range(codepoints):
+    """
+    Formats codepoints as a CSS unicode-range value, merging consecutive runs.
+    """
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and codepoint == ranges[-1][1] + 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ", ".join(f"U+{start:04X}" if start == end else f"U+{start:04X}-{end:04X}" for start, end in ranges)
+
+
+def build_font(font, codepoints, fonts_dir):
+    """
+    Pins a font to one weight, subsets it to the codepoints and writes it as WOFF2. Returns its manifest entry.
+    """
+    source_path = fetch_source(FONTS_DIRNAME, font["source"], font["url"])
+    ttfont = TTFont(source_path)
+    if "fvar" in ttfont:
+        ttfont = instancer.instantiateVariableFont(ttfont, {"wght": font["weight"]})
+    available = set(ttfont.getBestCmap())
+    kept = codepoints & available
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["kern", "liga", "calt"]
+    options.name_IDs = [1, 2]  # family and style names; the rest is license text already in the source files
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=kept)
+    subsetter.subset(ttfont)
+    filename = f"{font['family'].lower()}-{font['weight']}.woff2"
+    ttfont.flavor = "woff2"
+    ttfont.save(os.path.join(fonts_dir, filename))
+    return {
+        "family": font["family"],
+        "weight": font["weight"],
+        "file": f"{FONTS_DIRNAME}/{filename}",
+        "unicode_range": unicode_range(kept),
+        "preload": font["preload"]
+    }
+
+
+def build_sprite(icons_dir):
+    """
+    Combines the icon SVGs into one sprite of <symbol> elements, to be inlined into the page.
+    """
+    ElementTree.register_namespace("", "http://www.w3.org/2000/svg")
+    namespace = "{http://www.w3.org/2000/svg}"
+    symbols = []
+    for icon_id, url in ICONS.items():
+        root = ElementTree.parse(fetch_source(ICONS_DIRNAME, f"{icon_id}.svg", url)).getroot()
+        children = "".join(
+            re.sub(r"\s*xmlns(:\w+)?=\"[^\"]*\"", "", ElementTree.tostring(child, encoding="unicode"))
+            for child in root if child.tag != f"{namespace}title"
+        )
+        symbols.append(f"<symbol id=\"{icon_id}\" viewBox=\"{root.get('viewBox')}\">{children.strip()}</symbol>")
+    sprite = (
+        f"<svg xmlns=\"http://www.w3.org/2000/svg\" style=\"display: none\"><!-- {ICON_LICENSES} -->"
+        f"{''.join(symbols)}</svg>\n"
+    )
+    with open(os.path.join(icons_dir, SPRITE_FILENAME), "w") as file:
+        file.write(sprite)
+    return len(symbols)
+
+
+def build(static_dir=STATIC_DIR):
+    """
+    Writes subsetted WOFF2 fonts plus static/fonts/fonts.json, and the icon sprite to static/icons/sprite.svg.
+    Run it before build_assets.py so the fonts get fingerprinted too.
+    """
+    if subset is None:
+        raise SystemExit("fonttools is required: pip install fonttools")
+    fonts_dir = os.path.join(static_dir, FONTS_DIRNAME)
+    icons_dir = os.path.join(static_dir, ICONS_DIRNAME)
+    os.makedirs(fonts_dir, exist_ok=True)
+    os.makedirs(icons_dir, exist_ok=True)
+    codepoints = template_codepoints()
+    for start, end in LATIN_RANGES:
+        codepoints.update(range(start, end + 1))
+    fonts = [build_font(font, codepoints, fonts_dir) for font in FONTS]
+    with open(os.path.join(fonts_dir, FONTS_MANIFEST_FILENAME), "w") as file:
+        json.dump({"fonts": fonts}, file, indent=2)
+    return fonts, build_sprite(icons_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Subset the web fonts and build the icon sprite into static/.")
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    args = parser.parse_args()
+    fonts, icons = build(args.static_dir)
+    total = sum(os.path.getsize(os.path.join(args.static_dir, font["file"])) for font in fonts)
+    print(f"Wrote {len(fonts)} fonts ({total // 1024} KB) and a sprite of {icons} icons into {args.static_dir}")
@@ -0,0 +1,243 @@
+import codecs
+import csv
+import io
+import json
+import math
+import numpy as np
+
+BMI_RANGE_NAMES = np.array(["Underweight", "Normal weight", "Overweight", "Obese"])
+BMI_RANGE_LIMITS = [18.5, 25, 30]
+
+
+def tip_kernel(bill, tip, people):
+    bill_per_person = np.round(bill * (1 + tip / 100) / people, 2)
+    return {"bill_per_person": bill_per_person}
+
+
+def bmi_kernel(height_feet, height_inches, weight):
+    total_height_in = (height_feet * 12) + height_inches
+    bmi = np.round((weight * 703) / (total_height_in ** 2), 2)
+    # digitize buckets the same way as the calculator's if/elif chain: < 18.5, < 25, < 30, otherwise obese
+    bmi_range = BMI_RANGE_NAMES[np.digitize(bmi, BMI_RANGE_LIMITS)]
+    return {"bmi": bmi, "bmi_range": bmi_range}
+
+
+def life_in_weeks_kernel(age_years):
+    return {"weeks_remaining": np.round((90 - age_years) * 52)}
+
+
+def leap_year_kernel(year):
+    is_leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return {"is_leap_year": is_leap_year}
+
+
+# Each calculator lists its input columns as (name, must_be_integer, must_be_positive)
+CALCULATORS = {
+    "tip-calculator": {
+        "inputs": [("bill", False, False), ("tip", False, False), ("people", True, True)],
+        "outputs": ["bill_per_person"],
+        "kernel": tip_kernel
+    },
+    "bmi-calculator": {
+        "inputs": [("height_feet", True, False), ("height_inches", False, False), ("weight", False, False)],
+        "outputs": ["bmi", "bmi_range"],
+        "kernel": bmi_kernel
+    },
+    "life-in-weeks": {
+        "inputs": [("age_years", False, False)],
+        "outputs": ["weeks_remaining"],
+        "kernel": life_in_weeks_kernel
+    },
+    "leap-year-checker": {
+        "inputs": [("year", True, False)],
+        "outputs": ["is_leap_year"],
+        "kernel": leap_year_kernel
+    }
+}
+
+
+def parse_value(value, must_be_integer, must_be_positive):
+    """
+    Converts one raw input to a float, returning (number, error message).
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan, "must be a number"
+    if not math.isfinite(number):
+        return math.nan, "must be a finite number"
+    if must_be_integer and not number.is_integer():
+        return math.nan, "must be a whole number"
+    if must_be_positive and number <= 0:
+        return math.nan, "must be greater than zero"
+    return number, None
+
+
+def parse_column(values, must_be_integer, must_be_positive):
+    """
+    Converts one raw input column to floats, returning (numbers, {row index: error message}).
+    The whole column is converted by NumPy in one go; cells are only parsed one by one when that fails,
+    and for the few non-finite results, so missing and malformed cells get the same messages as parse_value.
+    """
+    try:
+        parsed = np.asarray(values, dtype=np.float64)
+        if parsed.ndim != 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for index, value in enumerate(values):
+            parsed[index] = parse_value(value, False, False)[0]
+    errors = {}
+    for index in np.flatnonzero(~np.isfinite(parsed)).tolist():
+        errors[index] = parse_value(values[index], False, False)[1] or "must be a finite number"
+    valid = np.isfinite(parsed)
+    if must_be_integer:
+        fractional = valid & (parsed != np.floor(parsed))
+        errors.update(dict.fromkeys(np.flatnonzero(fractional).tolist(), "must be a whole number"))
+        valid &= ~fractional
+    if must_be_positive:
+        errors.update(dict.fromkeys(np.flatnonzero(valid & (parsed <= 0)).tolist(), "must be greater than zero"))
+    for index in errors:
+        parsed[index] = math.nan
+    return parsed, errors
+
+
+def compute_chunk(calculator, columns, first_row):
+    """
+    Runs a calculator's vectorized kernel over one chunk of input columns.
+    Returns one result dict per row; invalid rows get an "error" message and no outputs.
+    """
+    spec = CALCULATORS[calculator]
+    row_count = len(next(iter(columns.values()))) if columns else 0
+    errors = {}
+    raw = {name: columns.get(name, [None] * row_count) for name, _, _ in spec["inputs"]}
+    arrays = {}
+    for name, must_be_integer, must_be_positive in spec["inputs"]:
+        arrays[name], column_errors = parse_column(raw[name], must_be_integer, must_be_positive)
+        for index, error in column_errors.items():
+            errors.setdefault(index, []).append(f"{name} {error}")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        outputs = spec["kernel"](**arrays)
+    # A zero height (or any other degenerate input) shows up as a non-finite result
+    for name, values in outputs.items():
+        if values.dtype.kind == "f":
+            for index in np.flatnonzero(~np.isfinite(values)).tolist():
+                if index not in errors:
+                    errors[index] = [f"{name} could not be calculated"]
+
+    output_values = [outputs[name].tolist() for name in spec["outputs"]]
+    row_errors = [None] * row_count
+    for index, messages in errors.items():
+        row_errors[index] = "; ".join(messages)
+        for values in output_values:
+            values[index] = None
+    fields = ["row", *raw, *spec["outputs"], "error"]
+    return [
+        dict(zip(fields, values))
+        for values in zip(range(first_row, first_row + row_count), *raw.values(), *output_values, row_errors)
+    ]
+
+
+def decode_stream(stream):
+    """
+    Decodes a byte stream as UTF-8 text lines. Invalid bytes become U+FFFD instead of raising mid-response,
+    so the cells they were in fail to parse and are reported as row errors.
+    """
+    return codecs.getreader("utf-8")(stream, errors="replace")
+
+
+def iter_row_chunks(rows, chunk_rows):
+    chunk = []
+    for record in rows:
+        chunk.append(record)
+        if len(chunk) == chunk_rows:
+            yield rows_to_columns(chunk)
+            chunk = []
+    if chunk:
+        yield rows_to_columns(chunk)
+
+
+def iter_csv_chunks(stream, chunk_rows):
+    """
+    Reads a CSV upload with a header row, yielding column chunks of at most chunk_rows rows.
+    """
+    return iter_row_chunks(csv.DictReader(decode_stream(stream)), chunk_rows)
+
+
+def iter_ndjson_chunks(stream, chunk_rows):
+    """
+    Reads one JSON object per line, yielding column chunks of at most chunk_rows rows.
+    Malformed lines still count as rows, so their error lines up with the input.
+    """
+    def rows():
+        for line in decode_stream(stream):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {}
+    return iter_row_chunks(rows(), chunk_rows)
+
+
+def iter_json_chunks(payload, chunk_rows):
+    """
+    Accepts {"rows": [{...}, ...]} or {"columns": {"name": [...], ...}} and returns an iterator of column chunks.
+    Raises ValueError straight away when the payload has neither shape.
+    The payload is already fully parsed, so unlike CSV and NDJSON input, JSON input isn't memory-bounded.
+    """
+    if isinstance(payload, dict) and isinstance(payload.get("rows"), list):
+        rows = payload["rows"]
+        return (
+            rows_to_columns([row if isinstance(row, dict) else {} for row in rows[start:start + chunk_rows]])
+            for start in range(0, len(rows), chunk_rows)
+        )
+    if isinstance(payload, dict) and isinstance(payload.get("columns"), dict):
+        columns = {name: values for name, values in payload["columns"].items() if isinstance(values, list)}
+        row_count = max((len(values) for values in columns.values()), default=0)
+        # Shorter columns are padded so their missing cells are reported as row errors
+        columns = {name: values + [None] * (row_count - len(values)) for name, values in columns.items()}
+        return (
+            {name: values[start:start + chunk_rows] for name, values in columns.items()}
+            for start in range(0, row_count, chunk_rows)
+        )
+    raise ValueError("Expected \"rows\" (a list of objects) or \"columns\" (an object of lists).")
+
+
+def rows_to_columns(rows):
+    names = {name for row in rows for name in row}
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def stream_results(calculator, chunks, output_format):
+    """
+    Computes chunk by chunk and yields the encoded output, so memory stays bounded by the chunk size.
+    """
+    spec = CALCULATORS[calculator]
+    fields = ["row"] + [name for name, _, _ in spec["inputs"]] + spec["outputs"] + ["error"]
+    first_row = 0
+    if output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        for chunk in chunks:
+            results = compute_chunk(calculator, chunk, first_row)
+            first_row += len(results)
+            writer.writerows(results)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        yield "{\"results\": ["
+        separator = ""
+        for chunk in chunks:
+            results = compute_chunk(calculator, chunk, first_row)
+            first_row += len(results)
+            if results:
+                yield separator + ", ".join(json.dumps(result) for result in results)
+                separator = ", "
+        yield f"], \"rows\": {first_row}}}"
@@ -0,0 +1,165 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+INPUT_FIELDS = ["person", "weight", "height_feet", "height_inches", "age", "query"]
+OUTPUT_FIELDS = ["rows", "person", "weight", "height_feet", "height_inches", "age", "query", "exercise", "nf_calories", "duration_min", "met", "stale", "error"]
+
+
+def decode_stream(stream):
+    """
+    Decodes a byte stream as UTF-8 text lines. Unlike io.TextIOWrapper this only needs read(),
+    which is all gunicorn's request body offers. Invalid bytes become U+FFFD instead of raising
+    mid-response; rows containing them are rejected with an error line.
+    """
+    return codecs.getreader("utf-8")(stream, errors="replace")
+
+
+def iter_csv_rows(stream):
+    yield from csv.DictReader(decode_stream(stream))
+
+
+def iter_ndjson_rows(stream):
+    for line in decode_stream(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        # Malformed lines still count as rows so their error lines up with the input
+        yield record if isinstance(record, dict) else {}
+
+
+def person_profile(row):
+    """
+    Converts a log row's imperial measurements to the metric values Nutritionix expects.
+    Raises ValueError for missing or malformed values, like the single workout calculator.
+    """
+    weight_lb = float(row["weight"])
+    height_ft = int(row["height_feet"])
+    height_in = float(row["height_inches"])
+    total_height_in = float((height_ft * 12) + height_in)
+    return int(weight_lb / 2.2046), int(total_height_in * 2.54), int(row["age"])
+
+
+def group_chunk(chunk, first_row, queries_per_call):
+    """
+    Groups one chunk of log rows by person so their exercises can share one natural-language query.
+    - Rows with a "person" value are grouped by it (and their measurements); without one, rows with
+      the same measurements are taken to be the same person.
+    Returns (batches, rejected rows); each batch is (profile, [(row number, row), ...]) and each
+    rejected row is (row number, row, error message).
+    """
+    groups = {}
+    rejected = []
+    for offset, row in enumerate(chunk):
+        row_number = first_row + offset
+        if any("\ufffd" in str(value) for value in row.values()):
+            rejected.append((row_number, row, "row is not valid UTF-8"))
+            continue
+        try:
+            profile = person_profile(row)
+            if not str(row.get("query") or "").strip():
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            rejected.append((row_number, row, "weight, height_feet, height_inches and age must be numbers and query must not be empty"))
+            continue
+        person = str(row.get("person") or "").strip() or None
+        groups.setdefault((person, profile), []).append((row_number, row))
+    batches = []
+    for (_, profile), rows in groups.items():
+        for start in range(0, len(rows), queries_per_call):
+            batches.append((profile, rows[start:start + queries_per_call]))
+    return batches, rejected
+
+
+def run_batch(fetch, profile, rows):
+    """
+    Sends one combined query for a person and returns one output record per exercise Nutritionix found.
+    fetch returns (answer, stale); stale records were served from an earlier lookup while Nutritionix was down.
+    """
+    weight_kg, height_cm, age = profile
+    first = rows[0][1]
+    record = {
+        "rows": " ".join(str(row_number) for row_number, _ in rows),
+        "person": first.get("person"),
+        "weight": first.get("weight"),
+        "height_feet": first.get("height_feet"),
+        "height_inches": first.get("height_inches"),
+        "age": first.get("age"),
+        "query": " and ".join(str(row["query"]).strip() for _, row in rows)
+    }
+    nutritionix_params = {
+        "query": record["query"],
+        "weight_kg": weight_kg,
+        "height_cm": height_cm,
+        "age": age
+    }
+    try:
+        data, stale = fetch(nutritionix_params)
+        exercises = data.get("exercises") or []
+    except Exception as error:
+        return [dict(record, error=f"Nutritionix lookup failed: {error}")]
+    if not exercises:
+        return [dict(record, stale=stale, error="No exercises recognized")]
+    return [
+        dict(record, exercise=exercise.get("name"), nf_calories=exercise.get("nf_calories"),
+             duration_min=exercise.get("duration_min"), met=exercise.get("met"), stale=stale, error=None)
+        for exercise in exercises
+    ]
+
+
+def iter_results(rows, fetch, chunk_rows, queries_per_call, concurrency):
+    """
+    Streams per-exercise records while later rows are still being read and looked up.
+    At most `concurrency` Nutritionix calls run at once, and only a bounded number of batches are queued ahead.
+    """
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+    try:
+        chunk = []
+        first_row = 0
+        rows = iter(rows)
+        while True:
+            row = next(rows, None)
+            if row is not None:
+                chunk.append(row)
+                if len(chunk) < chunk_rows:
+                    continue
+            if chunk:
+                batches, rejected = group_chunk(chunk, first_row, queries_per_call)
+                first_row += len(chunk)
+                chunk = []
+                for row_number, bad_row, error in rejected:
+                    yield dict({field: bad_row.get(field) for field in INPUT_FIELDS}, rows=str(row_number), error=error)
+                for profile, batch_rows in batches:
+                    pending.append(executor.submit(run_batch, fetch, profile, batch_rows))
+                    while len(pending) > 2 * concurrency:
+                        yield from pending.popleft().result()
+            if row is None:
+                break
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def encode_results(results, output_format):
+    if output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        yield buffer.getvalue()
+        for result in results:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(result)
+            yield buffer.getvalue()
+    else:
+        for result in results:
+            yield json.dumps(result) + "\n"
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker that trips on error rate, counting slow calls as errors.
+    - closed: calls go through; outcomes in the last window_seconds are tracked.
+    - open: calls fail fast for open_seconds once failure_ratio of at least min_calls have failed.
+    - half_open: one background probe is in flight; only its outcome closes or re-opens the circuit.
+      A probe that hasn't reported back within open_seconds is presumed lost and can be claimed again.
+    """
+
+    def __init__(self, name, failure_ratio=0.5, min_calls=5, window_seconds=60, slow_call_seconds=5.0, open_seconds=30):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Returns True when a normal call may go upstream.
+        """
+        return self.state == "closed"
+
+    def claim_probe(self):
+        """
+        Returns True for exactly one caller once the open period is over; that caller must run the probe
+        and record its outcome with probe=True.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if ((self.state == "open" and now >= self.opened_at + self.open_seconds)
+                    or (self.state == "half_open" and now >= self.probe_started_at + self.open_seconds)):
+                self.state = "half_open"
+                self.probe_started_at = now
+                return True
+            return False
+
+    def record(self, failed, seconds, probe=False):
+        """
+        Records one upstream call; calls slower than slow_call_seconds count as failures.
+        While half open, late results from calls made before the circuit opened are ignored.
+        """
+        failed = failed or seconds > self.slow_call_seconds
+        now = time.monotonic()
+        with self._lock:
+            if self.state == "half_open":
+                if not probe:
+                    return
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = "closed"
+                    self._calls.clear()
+                return
+            self._calls.append((now, failed))
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._calls.popleft()
+            failures = sum(1 for _, call_failed in self._calls if call_failed)
+            if self.state == "closed" and len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_ratio:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = "open"
+        self.opened_at = now
+        self._calls.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._calls),
+                "recent_failures": sum(1 for _, failed in self._calls if failed)
+            }
@@ -0,0 +1,220 @@
+import argparse
+import mmap
+import os
+import struct
+import unicodedata
+from bisect import bisect_left
+
+# Index file layout (all integers little-endian uint32, coordinates float64):
+# header | coordinates (lat, lon per record) | key offsets | key -> record | record offsets | populations | key blob | record blob
+MAGIC = b"GAZ1"
+HEADER = struct.Struct("<4sIII")
+KEY_SEPARATOR = "\x1f"
+
+
+def normalize(text):
+    """
+    Lowercases, strips accents and collapses whitespace so "São  Paulo" and "sao paulo" share a key.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(character for character in decomposed if not unicodedata.combining(character))
+    return " ".join(stripped.casefold().split())
+
+
+def make_key(city, state_country=""):
+    return f"{normalize(city)}{KEY_SEPARATOR}{normalize(state_country)}"
+
+
+def read_admin1_names(path):
+    names = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                columns = line.rstrip("\n").split("\t")
+                if len(columns) >= 2:
+                    names[columns[0]] = columns[1]
+    return names
+
+
+def read_country_names(path):
+    names = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("#"):
+                    continue
+                columns = line.rstrip("\n").split("\t")
+                if len(columns) >= 5:
+                    names[columns[0]] = columns[4]
+    return names
+
+
+def build_index(cities_path, index_path):
+    """
+    Compiles a GeoNames city dump (e.g. cities15000.txt) into a sorted, memory-mappable index.
+    - admin1CodesASCII.txt and countryInfo.txt next to the dump are used for state and country names when present.
+    - Every city is keyed by (city, country code), (city, country name), (city, state name/code) and (city, "") for prefix search.
+    - When two cities share a key, the more populous one wins.
+    Returns the number of keys written.
+    """
+    source_dir = os.path.dirname(os.path.abspath(cities_path))
+    admin1_names = read_admin1_names(os.path.join(source_dir, "admin1CodesASCII.txt"))
+    country_names = read_country_names(os.path.join(source_dir, "countryInfo.txt"))
+
+    records = []
+    best = {}
+    with open(cities_path, encoding="utf-8") as file:
+        for line in file:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) < 15:
+                continue
+            name, ascii_name = columns[1], columns[2]
+            country_code, admin1_code = columns[8], columns[10]
+            population = int(columns[14] or 0)
+            state = admin1_names.get(f"{country_code}.{admin1_code}", "")
+            record_index = len(records)
+            records.append((name, state, country_code, float(columns[4]), float(columns[5]), population))
+
+            regions = {"", country_code, country_names.get(country_code, ""), state}
+            if admin1_code.isalpha():
+                regions.add(admin1_code)
+            for city_name in {name, ascii_name}:
+                for region in regions:
+                    if region == "" and city_name != name:
+                        continue
+                    key = make_key(city_name, region)
+                    current = best.get(key)
+                    if current is None or records[current][5] < population:
+                        best[key] = record_index
+
+    keys = sorted(best)
+    used = sorted(set(best.values()))
+    remap = {old: new for new, old in enumerate(used)}
+    records = [records[index] for index in used]
+
+    key_blob = bytearray()
+    key_offsets = [0]
+    for key in keys:
+        key_blob += key.encode("utf-8")
+        key_offsets.append(len(key_blob))
+    record_blob = bytearray()
+    record_offsets = [0]
+    for name, state, country, _, _, _ in records:
+        record_blob += f"{name}\t{state}\t{country}".encode("utf-8")
+        record_offsets.append(len(record_blob))
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    temporary_path = f"{index_path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(keys), len(records), 0))
+        file.write(struct.pack(f"<{2 * len(records)}d", *[value for record in records for value in record[3:5]]))
+        file.write(struct.pack(f"<{len(key_offsets)}I", *key_offsets))
+        file.write(struct.pack(f"<{len(keys)}I", *[remap[best[key]] for key in keys]))
+        file.write(struct.pack(f"<{len(record_offsets)}I", *record_offsets))
+        file.write(struct.pack(f"<{len(records)}I", *[min(record[5], 0xFFFFFFFF) for record in records]))
+        file.write(key_blob)
+        file.write(record_blob)
+    # Workers that already mapped the old index keep reading it until they restart
+    os.replace(temporary_path, index_path)
+    return len(keys)
+
+
+class _Keys:
+    """
+    Sequence view over the sorted key blob so bisect can search it without decoding every key.
+    """
+
+    def __init__(self, gazetteer):
+        self.gazetteer = gazetteer
+
+    def __len__(self):
+        return self.gazetteer.key_count
+
+    def __getitem__(self, index):
+        return self.gazetteer.key_bytes(index)
+
+
+class Gazetteer:
+    """
+    Read-only, memory-mapped city index built by build_index().
+    The file is mapped rather than loaded, so every gunicorn worker shares the same pages.
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.key_count, self.record_count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not a gazetteer index")
+        view = memoryview(self._map)
+        position = HEADER.size
+        self._coordinates = view[position:position + 16 * self.record_count].cast("d")
+        position += 16 * self.record_count
+        self._key_offsets = view[position:position + 4 * (self.key_count + 1)].cast("I")
+        position += 4 * (self.key_count + 1)
+        self._key_records = view[position:position + 4 * self.key_count].cast("I")
+        position += 4 * self.key_count
+        self._record_offsets = view[position:position + 4 * (self.record_count + 1)].cast("I")
+        position += 4 * (self.record_count + 1)
+        self._populations = view[position:position + 4 * self.record_count].cast("I")
+        position += 4 * self.record_count
+        self._key_blob_start = position
+        self._record_blob_start = position + self._key_offsets[self.key_count]
+        self._keys = _Keys(self)
+
+    def key_bytes(self, index):
+        start = self._key_blob_start
+        return self._map[start + self._key_offsets[index]:start + self._key_offsets[index + 1]]
+
+    def record(self, record_index):
+        """
+        Returns a record shaped like an OpenWeatherMap geocoding result.
+        """
+        start = self._record_blob_start
+        text = self._map[start + self._record_offsets[record_index]:start + self._record_offsets[record_index + 1]]
+        name, state, country = text.decode("utf-8").split("\t")
+        # state is "" when the admin1 names weren't available at build time
+        return {
+            "name": name,
+            "state": state,
+            "country": country,
+            "lat": self._coordinates[2 * record_index],
+            "lon": self._coordinates[2 * record_index + 1]
+        }
+
+    def lookup(self, city, state_country):
+        """
+        Returns the city record for an exact (city, state/country) match, or None.
+        """
+        key = make_key(city, state_country).encode("utf-8")
+        index = bisect_left(self._keys, key)
+        if index < self.key_count and self.key_bytes(index) == key:
+            return self.record(self._key_records[index])
+        return None
+
+    def prefix_search(self, prefix, limit=10):
+        """
+        Returns up to `limit` distinct cities whose name starts with `prefix`, most populous first.
+        """
+        encoded = normalize(prefix).encode("utf-8")
+        if not encoded:
+            return []
+        index = bisect_left(self._keys, encoded)
+        matches = set()
+        while index < self.key_count:
+            key = self.key_bytes(index)
+            if not key.startswith(encoded):
+                break
+            matches.add(self._key_records[index])
+            index += 1
+        ranked = sorted(matches, key=lambda record_index: self._populations[record_index], reverse=True)
+        return [self.record(record_index) for record_index in ranked[:limit]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline gazetteer index from a GeoNames city dump.")
+    parser.add_argument("cities", help="path to a GeoNames cities file, e.g. cities15000.txt")
+    parser.add_argument("--output", default=os.path.join("instance", "gazetteer.idx"))
+    args = parser.parse_args()
+    key_count = build_index(args.cities, args.output)
+    print(f"Wrote {key_count} keys to {args.output}")
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import time
+
+CONFIG_LOADED = time.perf_counter()
+
+# Serving mode: "sync" runs one request per worker at a time; "async" runs gevent workers where
+# waits on genderize, agify, OpenWeatherMap, Nutritionix and SMTP yield to other requests
+WORKER_MODE = os.environ.get("WORKER_MODE", "sync")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 3))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+worker_class = "gevent" if WORKER_MODE == "async" else "sync"
+# In-flight requests per async worker
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", 1000))
+
+# Fast boot: import and warm up the app once in the master, so workers fork with it ready.
+# Off by default for gevent workers, which must monkey-patch before requests and ssl are imported.
+preload_app = os.environ.get("PRELOAD_APP", "false" if WORKER_MODE == "async" else "true").lower() == "true"
+
+# Every worker writes its metrics to files here so /metrics can aggregate across workers;
+# set before the app (and prometheus_client) is imported
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "portfolio-metrics"))
+from prometheus_client import multiprocess  # noqa: E402 (needs the variable above)
+
+
+def on_starting(server):
+    # Start each run with fresh counters
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked; only logged, since forked workers would inherit its gauges
+    if not preload_app:
+        return
+    import main
+    loaded = time.perf_counter()
+    report = main.warm_up(preload_modules=True)
+    server.log.info("Master loaded the app in %.0f ms and warmed up in %.0f ms (%s templates in %s ms, %s pages in %s ms)",
+                    (loaded - CONFIG_LOADED) * 1000, (time.perf_counter() - loaded) * 1000,
+                    report["templates"], report["compile_ms"], report["pages"], report["render_ms"])
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded and before it accepts connections
+    import main
+    import metrics
+    loaded = time.perf_counter()
+    if not preload_app:
+        report = main.warm_up()
+        metrics.WORKER_BOOT_SECONDS.labels("load").set(loaded - worker.boot_started)
+        metrics.WORKER_BOOT_SECONDS.labels("warmup").set(time.perf_counter() - loaded)
+        worker.log.info("Worker %s loaded the app in %.0f ms and warmed up in %.0f ms (%s templates in %s ms, %s pages in %s ms)",
+                        worker.pid, (loaded - worker.boot_started) * 1000, (time.perf_counter() - loaded) * 1000,
+                        report["templates"], report["compile_ms"], report["pages"], report["render_ms"])
+    ready = time.perf_counter() - worker.boot_started
+    metrics.WORKER_BOOT_SECONDS.labels("ready").set(ready)
+    worker.log.info("Worker %s ready %.0f ms after fork", worker.pid, ready * 1000)
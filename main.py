@@ -1,10 +1,29 @@
 from dotenv import load_dotenv
 import os
-from flask import Flask, render_template, request
-import smtplib
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, send_from_directory, url_for, g, has_app_context
 import datetime
 import random
+import time
+import json
+import hashlib
+import threading
+import collections
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from outbox import Outbox
+from gazetteer import Gazetteer
+from shared_cache import SharedCache
+import bulk_workouts
+from page_cache import PageCache
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+import metrics
+from profiler import RequestProfiler
+from blocking import run_blocking
+from requests.adapters import HTTPAdapter
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from urllib3.util.retry import Retry
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,39 +31,385 @@ load_dotenv()
 # smtplib constants
 MY_EMAIL = os.environ.get("MY_EMAIL")
 MY_PASSWORD = os.environ.get("MY_PASSWORD")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+# outbox constants
+OUTBOX_SPOOL_PATH = os.environ.get("OUTBOX_SPOOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "outbox.sqlite3"))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
 # genderize constant
-GENDERIZE_API_ENDPOINT = "https://api.genderize.io"
+GENDERIZE_API_ENDPOINT = os.environ.get("GENDERIZE_API_ENDPOINT", "https://api.genderize.io")
 # ageify constant
-AGEIFY_API_ENDPOINT = "https://api.agify.io"
+AGEIFY_API_ENDPOINT = os.environ.get("AGEIFY_API_ENDPOINT", "https://api.agify.io")
+# circuit breaker constants
+BREAKER_FAILURE_RATIO = float(os.environ.get("BREAKER_FAILURE_RATIO", 0.5))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", 5))
+BREAKER_WINDOW_SECONDS = int(os.environ.get("BREAKER_WINDOW_SECONDS", 60))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", 5))
+BREAKER_OPEN_SECONDS = int(os.environ.get("BREAKER_OPEN_SECONDS", 30))
+# upstream cache constants
+UPSTREAM_CACHE_PATH = os.environ.get("UPSTREAM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "upstream-cache.sqlite3"))
+UPSTREAM_CACHE_MAX_ENTRIES = int(os.environ.get("UPSTREAM_CACHE_MAX_ENTRIES", 20000))
+UPSTREAM_CACHE_NEGATIVE_TTL = 60 * 60  # "no result" answers are retried after an hour
+# name insights constants
+NAME_INSIGHTS_BATCH_SIZE = 10  # genderize and agify accept at most 10 names per request
+NAME_INSIGHTS_MAX_NAMES = int(os.environ.get("NAME_INSIGHTS_MAX_NAMES", 1000))
+NAME_INSIGHTS_MAX_WORKERS = int(os.environ.get("NAME_INSIGHTS_MAX_WORKERS", 8))
+# bulk calculator constants
+BULK_CHUNK_ROWS = int(os.environ.get("BULK_CHUNK_ROWS", 10000))
+WORKOUT_BULK_CHUNK_ROWS = int(os.environ.get("WORKOUT_BULK_CHUNK_ROWS", 500))
+WORKOUT_BULK_QUERIES_PER_CALL = int(os.environ.get("WORKOUT_BULK_QUERIES_PER_CALL", 10))
+WORKOUT_BULK_CONCURRENCY = int(os.environ.get("WORKOUT_BULK_CONCURRENCY", 4))
+# simulation constants
+SIMULATION_MAX_ROUNDS = int(os.environ.get("SIMULATION_MAX_ROUNDS", 500_000_000))
+SIMULATION_CHUNK_ROUNDS = int(os.environ.get("SIMULATION_CHUNK_ROUNDS", 1_000_000))
+SIMULATION_PROCESSES = int(os.environ.get("SIMULATION_PROCESSES", 0))  # 0 uses every available core
 # openweathermap constants
 OPENWEATHERMAP_API_KEY = os.environ.get("OPENWEATHERMAP_API_KEY")
-GEOCODING_API_ENDPOINT = "http://api.openweathermap.org/geo/1.0/direct"
-OPENWEATHERMAP_API_ENDPOINT = "http://api.openweathermap.org/data/2.5/forecast"
+GEOCODING_API_ENDPOINT = os.environ.get("GEOCODING_API_ENDPOINT", "http://api.openweathermap.org/geo/1.0/direct")
+OPENWEATHERMAP_API_ENDPOINT = os.environ.get("OPENWEATHERMAP_API_ENDPOINT", "http://api.openweathermap.org/data/2.5/forecast")
+# forecast cache constants
+FORECAST_SLOT_SECONDS = 3 * 60 * 60  # OpenWeatherMap publishes forecasts in 3-hour slots
+FORECAST_COORDINATE_DECIMALS = 2  # roughly 1 km, so nearby lookups share an entry
+FORECAST_REFRESH_AHEAD_SECONDS = 10 * 60
+FORECAST_REFRESH_DELAY_SECONDS = 2  # refreshes run just after the slot boundary, once the provider's list has moved on
+FORECAST_POPULAR_HITS = 3
+FORECAST_MEMORY_MAX_ENTRIES = 1024
+# gazetteer constant (build with: python gazetteer.py cities15000.txt)
+GAZETTEER_INDEX_PATH = os.environ.get("GAZETTEER_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "gazetteer.idx"))
 # nutritionix constants
 NUTRITIONIX_APP_ID = os.environ.get("NUTRITIONIX_APP_ID")
 NUTRITIONIX_API_KEY = os.environ.get("NUTRITIONIX_API_KEY")
-NUTRITIONIX_ENDPOINT = "https://trackapi.nutritionix.com/v2/natural/exercise"
+NUTRITIONIX_ENDPOINT = os.environ.get("NUTRITIONIX_ENDPOINT", "https://trackapi.nutritionix.com/v2/natural/exercise")
 NUTRITIONIX_HEADERS = {
     "x-app-id": NUTRITIONIX_APP_ID,
     "x-app-key": NUTRITIONIX_API_KEY
 }
+# profiling constants (off unless PROFILE_SAMPLE_EVERY or PROFILE_SECRET is set)
+PROFILE_SAMPLE_EVERY = int(os.environ.get("PROFILE_SAMPLE_EVERY", 0))  # profile one request in N (needs PROFILE_SECRET to read them)
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET")  # requests sending "X-Profile: <secret>" are always profiled
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", 200))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "profiles"))
+# fast boot constant: compiled templates persist here across worker restarts (pre-filled at build time)
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "jinja-cache"))
+# upstream http client constants
+# async (gevent) workers keep hundreds of upstream calls in flight, so they need a bigger pool per host
+WORKER_MODE = os.environ.get("WORKER_MODE", "sync")
+UPSTREAM_POOL_CONNECTIONS = int(os.environ.get("UPSTREAM_POOL_CONNECTIONS", 10))  # number of hosts kept pooled
+UPSTREAM_POOL_MAXSIZE = int(os.environ.get("UPSTREAM_POOL_MAXSIZE", 200 if WORKER_MODE == "async" else 10))  # keep-alive connections kept per host
+UPSTREAM_MAX_RETRIES = int(os.environ.get("UPSTREAM_MAX_RETRIES", 2))
+UPSTREAM_BACKOFF_FACTOR = float(os.environ.get("UPSTREAM_BACKOFF_FACTOR", 0.3))
+UPSTREAM_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# (connect timeout, read timeout) in seconds per endpoint
+UPSTREAM_DEFAULT_TIMEOUT = (3.05, 10)
+UPSTREAM_TIMEOUTS = {
+    GENDERIZE_API_ENDPOINT: (3.05, 5),
+    AGEIFY_API_ENDPOINT: (3.05, 5),
+    GEOCODING_API_ENDPOINT: (3.05, 5),
+    OPENWEATHERMAP_API_ENDPOINT: (3.05, 10),
+    NUTRITIONIX_ENDPOINT: (3.05, 10)
+}
+# cache time-to-live in seconds per endpoint
+UPSTREAM_CACHE_TTLS = {
+    GENDERIZE_API_ENDPOINT: 7 * 24 * 60 * 60,
+    AGEIFY_API_ENDPOINT: 7 * 24 * 60 * 60,
+    GEOCODING_API_ENDPOINT: 30 * 24 * 60 * 60,
+    OPENWEATHERMAP_API_ENDPOINT: 10 * 60,
+    NUTRITIONIX_ENDPOINT: 24 * 60 * 60
+}
 
 app = Flask(__name__)
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=JINJA_CACHE_DIR)
+# Registered first so request timing covers every other hook
+metrics.init_app(app)
+# Per-request stack sampling, writing collapsed-stack files to a bounded ring on disk
+profiler = RequestProfiler(
+    output_dir=PROFILE_DIR,
+    sample_every=PROFILE_SAMPLE_EVERY,
+    secret=PROFILE_SECRET,
+    interval=PROFILE_INTERVAL_MS / 1000,
+    ring_size=PROFILE_RING_SIZE
+)
+profiler.init_app(app, skip_endpoints=("profile_index", "profile_file", "prometheus_metrics"))
 
+# Fingerprinted static assets written by build_assets.py; empty until it has been run
+ASSET_MANIFEST_PATH = os.path.join(app.static_folder, "dist", "manifest.json")
+asset_manifest = {"files": {}, "images": {}}
+if os.path.exists(ASSET_MANIFEST_PATH):
+    with open(ASSET_MANIFEST_PATH) as manifest_file:
+        asset_manifest = json.load(manifest_file)
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-def send_email(subject, full_name, email, phone_number, message):
-    with smtplib.SMTP("smtp.gmail.com") as connection:
-        connection.starttls()  # Secure the connection
-        connection.login(MY_EMAIL, MY_PASSWORD)
-        connection.sendmail(
-            from_addr=MY_EMAIL, 
-            to_addrs=MY_EMAIL, 
-            msg=f"Subject: {subject}\n\n"
-            f"Full Name: {full_name}\n"
-            f"Email: {email}\n"
-            f"Phone Number: {phone_number}\n"
-            f"Message: {message}"
+# Subsetted fonts and the icon sprite written by build_fonts.py; until it has been run,
+# the pages keep loading Google Fonts, boxicons and Font Awesome from their CDNs
+FONTS_MANIFEST_PATH = os.path.join(app.static_folder, "fonts", "fonts.json")
+ICON_SPRITE_PATH = os.path.join(app.static_folder, "icons", "sprite.svg")
+self_hosted_fonts = []
+if os.path.exists(FONTS_MANIFEST_PATH):
+    with open(FONTS_MANIFEST_PATH) as fonts_file:
+        self_hosted_fonts = json.load(fonts_file)["fonts"]
+icon_sprite = None
+if os.path.exists(ICON_SPRITE_PATH):
+    with open(ICON_SPRITE_PATH) as sprite_file:
+        icon_sprite = Markup(sprite_file.read())
+ASSET_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+# Rendered GET pages, invalidated when a template changes or the year rolls over
+page_cache = PageCache(template_folder=os.path.join(app.root_path, app.template_folder))
+
+# Offline city index, memory-mapped so all workers share it; None when it hasn't been built
+gazetteer = Gazetteer(GAZETTEER_INDEX_PATH) if os.path.exists(GAZETTEER_INDEX_PATH) else None
+
+# Upstream response cache shared by all workers
+upstream_cache = SharedCache(path=UPSTREAM_CACHE_PATH, max_entries=UPSTREAM_CACHE_MAX_ENTRIES)
+
+# One circuit breaker per upstream endpoint, per worker
+upstream_breakers = {
+    url: CircuitBreaker(
+        name=url,
+        failure_ratio=BREAKER_FAILURE_RATIO,
+        min_calls=BREAKER_MIN_CALLS,
+        window_seconds=BREAKER_WINDOW_SECONDS,
+        slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=BREAKER_OPEN_SECONDS
+    )
+    for url in UPSTREAM_TIMEOUTS
+}
+# Errors the API-backed routes turn into an "N/A" answer instead of a 500
+UPSTREAM_ERRORS = (requests.RequestException, CircuitOpenError)
+
+# One pooled keep-alive session per worker process, created on first use
+upstream_session = None
+
+
+def get_upstream_session():
+    """
+    Returns the worker's shared requests session.
+    - Connections are pooled per host, so the TCP/TLS handshake is paid once per worker instead of once per request.
+    - Failed connects and retryable statuses are retried with exponential backoff.
+    """
+    global upstream_session
+    if upstream_session is None:
+        retry = Retry(
+            total=UPSTREAM_MAX_RETRIES,
+            backoff_factor=UPSTREAM_BACKOFF_FACTOR,
+            status_forcelist=UPSTREAM_RETRY_STATUSES,
+            # Nutritionix's natural language endpoint is a read-only calculation, so its POST is safe to retry
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
         )
+        adapter = HTTPAdapter(pool_connections=UPSTREAM_POOL_CONNECTIONS, pool_maxsize=UPSTREAM_POOL_MAXSIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        upstream_session = session
+    return upstream_session
+
+
+def upstream_request(method, url, **kwargs):
+    """
+    Sends a request through the shared session using the endpoint's connect/read timeouts.
+    """
+    kwargs.setdefault("timeout", UPSTREAM_TIMEOUTS.get(url, UPSTREAM_DEFAULT_TIMEOUT))
+    with metrics.track_upstream(url):
+        return get_upstream_session().request(method=method, url=url, **kwargs)
+
+
+def upstream_fetch_seconds(url):
+    """
+    Returns the longest a call to an endpoint can take: every attempt timing out, plus the backoff between retries.
+    Cache misses waiting on another worker's fetch wait this long before giving up on it.
+    """
+    connect_timeout, read_timeout = UPSTREAM_TIMEOUTS.get(url, UPSTREAM_DEFAULT_TIMEOUT)
+    backoff = sum(UPSTREAM_BACKOFF_FACTOR * 2 ** retry for retry in range(UPSTREAM_MAX_RETRIES))
+    return (UPSTREAM_MAX_RETRIES + 1) * (connect_timeout + read_timeout) + backoff + 1
+
+
+def is_empty_result(url, data):
+    """
+    Recognizes upstream "no result" answers so they can be cached for a shorter time.
+    """
+    if url == GEOCODING_API_ENDPOINT:
+        return data == []
+    if url == GENDERIZE_API_ENDPOINT and isinstance(data, dict):
+        return data.get("gender") is None
+    if url == AGEIFY_API_ENDPOINT and isinstance(data, dict):
+        return data.get("age") is None
+    if url == NUTRITIONIX_ENDPOINT:
+        return not data.get("exercises")
+    return False
+
+
+def upstream_cache_key(method, url, params=None, json_body=None):
+    # Hashed so the API keys in the parameters never end up in the cache file in plain text
+    return hashlib.sha256(json.dumps([method, url, params, json_body], sort_keys=True).encode()).hexdigest()
+
+
+def is_upstream_fault(error):
+    """
+    Tells host trouble (timeouts, connection errors, 5xx, 429) apart from answers to a bad request.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def fetch_upstream_json(method, url, params=None, json_body=None, headers=None, probe=False):
+    """
+    Calls an upstream endpoint through its circuit breaker and returns the decoded JSON.
+    - Fails fast with CircuitOpenError while the breaker is open (probe calls skip that check).
+    - Errors and slow calls are recorded so a struggling host trips the breaker. Every outcome is recorded,
+      unexpected exceptions included, so a probe can't leave the breaker half open.
+    """
+    breaker = upstream_breakers[url]
+    if not probe and not breaker.allow_request():
+        raise CircuitOpenError(f"{url} is unavailable")
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = upstream_request(method, url, params=params, json=json_body, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        failed = False
+    except requests.RequestException as error:
+        failed = is_upstream_fault(error)
+        raise
+    finally:
+        breaker.record(failed=failed, seconds=time.perf_counter() - started, probe=probe)
+    return data
+
+
+def mark_stale():
+    # Lets templates and JSON answers say the data came from an earlier lookup
+    if has_app_context():
+        g.upstream_stale = True
+
+
+def upstream_lookup(method, url, params=None, json_body=None, headers=None, ttl=None):
+    """
+    Returns (JSON answer, stale) for an upstream endpoint, served from the shared cache when possible.
+    - Identical lookups from any worker share one cache entry, and concurrent misses share one upstream call.
+    - ttl overrides the endpoint's time-to-live in seconds; error responses raise and are never cached.
+    - When the upstream fails or its breaker is open, the last known good answer is returned with stale=True
+      and, once the breaker's open period is over, a background probe re-checks the host.
+    Safe to call from worker threads, which have no request context to flag the stale answer on.
+    """
+    cache_key = upstream_cache_key(method, url, params, json_body)
+
+    def endpoint_ttl(data):
+        if is_empty_result(url, data):
+            return UPSTREAM_CACHE_NEGATIVE_TTL
+        return UPSTREAM_CACHE_TTLS.get(url, UPSTREAM_CACHE_NEGATIVE_TTL)
+
+    cache_ttl = ttl or endpoint_ttl
+
+    def probe():
+        try:
+            data = fetch_upstream_json(method, url, params, json_body, headers, probe=True)
+        except requests.RequestException:
+            return
+        upstream_cache.set(cache_key, data, cache_ttl(data) if callable(cache_ttl) else cache_ttl)
+
+    def fetch():
+        if upstream_breakers[url].claim_probe():
+            threading.Thread(target=probe, daemon=True).start()
+        return fetch_upstream_json(method, url, params, json_body, headers)
+
+    try:
+        return upstream_cache.get_or_fetch(cache_key, fetch, cache_ttl, flight_timeout=upstream_fetch_seconds(url)), False
+    except UPSTREAM_ERRORS:
+        stale = upstream_cache.get(cache_key, allow_stale=True)
+        if stale is None:
+            raise
+        return stale[0], True
+
+
+def upstream_json(method, url, params=None, json_body=None, headers=None, ttl=None):
+    """
+    Returns an upstream endpoint's JSON answer like upstream_lookup, flagging a stale answer on the request.
+    """
+    data, stale = upstream_lookup(method, url, params, json_body, headers, ttl)
+    if stale:
+        mark_stale()
+    return data
+
+
+outbox = Outbox(
+    spool_path=OUTBOX_SPOOL_PATH,
+    smtp_host=SMTP_HOST,
+    smtp_port=SMTP_PORT,
+    smtp_starttls=SMTP_STARTTLS,
+    username=MY_EMAIL,
+    password=MY_PASSWORD,
+    batch_size=OUTBOX_BATCH_SIZE,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    track_send=lambda: metrics.track_upstream("smtp")
+)
+
+
+def send_email(subject, full_name, email, phone_number, message):
+    """
+    Queues the contact form email in the outbox; the background sender delivers it.
+    """
+    outbox.enqueue(
+        from_addr=MY_EMAIL, 
+        to_addrs=MY_EMAIL, 
+        msg=f"Subject: {subject}\n\n"
+        f"Full Name: {full_name}\n"
+        f"Email: {email}\n"
+        f"Phone Number: {phone_number}\n"
+        f"Message: {message}"
+    )
+
+
+@app.before_request
+def start_outbox_sender():
+    # Drains messages left in the spool by a previous worker as soon as this one serves traffic
+    outbox.ensure_started()
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    # Rewrites url_for('static', filename=...) to the content-hashed copy, which can be cached forever
+    if endpoint == "static" and "filename" in values:
+        values["filename"] = asset_manifest["files"].get(values["filename"], values["filename"])
+
+
+@app.before_request
+def serve_precompressed_asset():
+    """
+    Serves the .br or .gz sibling of a fingerprinted asset when the browser accepts it.
+    """
+    if not request.path.startswith("/static/dist/"):
+        return None
+    filename = request.path[len("/static/"):]
+    for encoding, suffix in ASSET_PRECOMPRESSED:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetypes.guess_type(filename)[0])
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+    return None
+
+
+@app.after_request
+def cache_fingerprinted_assets(response):
+    if request.path.startswith("/static/dist/") and response.status_code in (200, 304):
+        response.headers["Cache-Control"] = ASSET_CACHE_CONTROL
+    return response
+
+
+@app.template_global()
+def image_srcset(filename, image_format):
+    """
+    Returns the srcset for an image's resized variants in one format, or "" when none were built.
+    """
+    variants = asset_manifest["images"].get(filename, {}).get(image_format, [])
+    return ", ".join(f"{url_for('static', filename=path)} {width}w" for path, width in variants)
 
 
 # Built-in way to inject common variables into the template context for all templates rendered
@@ -53,11 +418,15 @@ def send_email(subject, full_name, email, phone_number, message):
 def inject_common_variables():
     current_year = datetime.datetime.now().year
     return {
-        'current_year': current_year
+        'current_year': current_year,
+        'UPSTREAM_STALE': g.get("upstream_stale", False),
+        'SELF_HOSTED_FONTS': self_hosted_fonts,
+        'ICON_SPRITE': icon_sprite
         }
 
 
 @app.route(rule="/")
+@page_cache.cached_get
 def home():
     return render_template(template_name_or_list="index.html")
 
@@ -67,10 +436,11 @@ def footer():
 
 
 @app.route(rule="/thank-you", methods=["GET", "POST"])
+@page_cache.cached_get
 def contact():
     """
     Handles the contact form submission.
-    - On POST request: collects form data, sends an email, and renders a thank-you page.
+    - On POST request: collects form data, queues an email in the outbox, and renders a thank-you page.
     - On GET request: renders the contact form.
     """
     if request.method == "POST":
@@ -81,19 +451,73 @@ def contact():
         subject_input = data["subject"]
         message_input = data["message"]
 
-        # Send the email
+        # Queue the email
         send_email(subject=subject_input, full_name=full_name_input, email=email_input, phone_number=phone_number_input, message=message_input)
         return render_template(template_name_or_list="thank-you.html")
     return render_template(template_name_or_list="index.html")
 
 
+@app.route(rule="/outbox/stats")
+def outbox_stats():
+    """
+    Reports outbox spool depth and send latency as JSON.
+    """
+    return jsonify(outbox.stats())
+
+
+@app.route(rule="/cache/stats")
+def cache_stats():
+    """
+    Reports shared upstream cache hit/miss statistics as JSON.
+    """
+    return jsonify(upstream_cache.stats())
+
+
+@app.route(rule="/metrics")
+def prometheus_metrics():
+    """
+    Exposes request, render and upstream latency metrics in the Prometheus text format.
+    """
+    body, content_type = metrics.render_latest()
+    return Response(body, content_type=content_type)
+
+
+@app.route(rule="/profiles")
+def profile_index():
+    """
+    Lists the slowest captured request profiles.
+    - Requires the profiling secret in the X-Profile header; 404 otherwise. It is never taken from the URL,
+      where it would end up in access logs, browser history and Referer headers.
+    """
+    if not profiler.is_authorized(request.headers.get(profiler.header)):
+        return jsonify(error="Not found."), 404
+    profiles = profiler.slowest()
+    for profile in profiles:
+        profile["captured"] = datetime.datetime.fromtimestamp(profile["captured_at"], tz=datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return render_template(template_name_or_list="profiles.html", PROFILES=profiles)
+
+
+@app.route(rule="/profiles/<profile_id>")
+def profile_file(profile_id):
+    """
+    Downloads one collapsed-stack profile by the id sent back in the X-Profile-Id header.
+    Requires the profiling secret in the X-Profile header, like the index.
+    """
+    name = profiler.find(profile_id) if profiler.is_authorized(request.headers.get(profiler.header)) else None
+    if name is None:
+        return jsonify(error="Not found."), 404
+    return send_from_directory(profiler.output_dir, name, mimetype="text/plain", as_attachment=True)
+
+
 @app.route(rule="/projects")
+@page_cache.cached_get
 def projects():
     return render_template(template_name_or_list="projects.html")
 
 
 # Band Name Generator
 @app.route(rule="/projects/band-name-generator", methods=["GET", "POST"])
+@page_cache.cached_get
 def band_name_generator():
     """
     Generates a band name based on user input.
@@ -111,6 +535,7 @@ def band_name_generator():
 
 # Tip Calculator
 @app.route(rule="/projects/tip-calculator", methods=["GET", "POST"])
+@page_cache.cached_get
 def tip_calculator():
     """
     Calculates the tip per person based on user input.
@@ -137,6 +562,7 @@ def tip_calculator():
 
 # BMI Calculator
 @app.route(rule="/projects/bmi-calculator", methods=["GET", "POST"])
+@page_cache.cached_get
 def bmi_calculator():
     """
     Calculates the Body Mass Index (BMI) based on user input.
@@ -176,6 +602,7 @@ def bmi_calculator():
 
 # Life in Weeks
 @app.route(rule="/projects/life-in-weeks", methods=["GET", "POST"])
+@page_cache.cached_get
 def life_in_weeks():
     """
     Calculates remaining weeks in a person's life based on current age.
@@ -198,6 +625,7 @@ def life_in_weeks():
 
 # Leap Year Checker
 @app.route(rule="/projects/leap-year-checker", methods=["GET", "POST"])
+@page_cache.cached_get
 def leap_year_checker():
     """
     Checks if a given year is a leap year.
@@ -225,8 +653,43 @@ def leap_year_checker():
     return render_template(template_name_or_list="leap-year-checker.html")
 
 
+# Bulk Calculator API
+@app.route(rule="/api/bulk/<calculator>", methods=["POST"])
+def bulk_calculator(calculator):
+    """
+    Runs the tip, BMI, life in weeks or leap year calculator over many rows at once.
+    - Accepts a CSV body or "file" upload with a header row, NDJSON (one object per line), or JSON with "rows" or "columns".
+    - Responds with CSV or JSON (?format=csv|json; defaults to CSV for CSV input, else JSON), computed in chunks and streamed.
+    - CSV and NDJSON are read chunk by chunk, so memory stays bounded; a JSON body is parsed whole, so use them for large inputs.
+    - Rows that can't be calculated carry an "error" message instead of failing the whole batch.
+    """
+    # Imported here so NumPy only loads once the bulk API is used, keeping worker boot fast
+    from bulk_calculators import CALCULATORS, iter_csv_chunks, iter_ndjson_chunks, iter_json_chunks, stream_results
+    if calculator not in CALCULATORS:
+        return jsonify(error=f"Unknown calculator. Choose one of: {', '.join(CALCULATORS)}."), 404
+    if request.mimetype == "text/csv":
+        chunks = iter_csv_chunks(request.stream, BULK_CHUNK_ROWS)
+        input_format = "csv"
+    elif request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        chunks = iter_ndjson_chunks(request.stream, BULK_CHUNK_ROWS)
+        input_format = "json"
+    elif "file" in request.files:
+        chunks = iter_csv_chunks(request.files["file"].stream, BULK_CHUNK_ROWS)
+        input_format = "csv"
+    else:
+        try:
+            chunks = iter_json_chunks(request.get_json(silent=True), BULK_CHUNK_ROWS)
+        except ValueError as error:
+            return jsonify(error=str(error)), 400
+        input_format = "json"
+    output_format = request.args.get("format", input_format)
+    mimetype = "text/csv" if output_format == "csv" else "application/json"
+    return Response(stream_with_context(stream_results(calculator, chunks, output_format)), mimetype=mimetype)
+
+
 # Heads or Tails
 @app.route(rule="/projects/heads-or-tails", methods=["GET", "POST"])
+@page_cache.cached_get
 def heads_or_tails():
     """
     Simulates a coin flip (heads or tails).
@@ -245,6 +708,7 @@ def heads_or_tails():
 
 # Rocks, Paper, Scissors
 @app.route(rule="/projects/rock-paper-scissors", methods=["GET", "POST"])
+@page_cache.cached_get
 def rock_paper_scissors():
     """
     Simulates a rock-paper-scissors game against the computer.
@@ -256,24 +720,74 @@ def rock_paper_scissors():
         1: "Paper", 
         2: "Scissors"
     }
+    results = {
+        "win": "You win!",
+        "tie": "It's a tie!",
+        "loss": "You lose!"
+    }
     if request.method == "POST":
+        from simulations import GAMES, OUTCOME_NAMES
         data = request.form
         player_hand = data["choice"]
-        ai_hand = hand[random.randint(0, 2)]
-        if player_hand == ai_hand:
-            result = "It's a tie!"
-        elif (player_hand == "Rock" and ai_hand == "Scissors") or \
-             (player_hand == "Paper" and ai_hand == "Rock") or \
-             (player_hand == "Scissors" and ai_hand == "Paper"):
-            result = "You win!"
+        ai_move = random.randint(0, 2)
+        ai_hand = hand[ai_move]
+        game = GAMES["rock-paper-scissors"]
+        if player_hand in game["moves"]:
+            result = results[OUTCOME_NAMES[game["outcomes"][game["moves"].index(player_hand), ai_move]]]
         else:
-            result = "You lose!"
+            result = results["loss"]
         return render_template(template_name_or_list="rock-paper-scissors.html", PLAYER_HAND=player_hand, AI_HAND=ai_hand, RESULT=result)
     return render_template(template_name_or_list="rock-paper-scissors.html")
 
 
+@app.route(rule="/api/simulate/<game>", methods=["POST"])
+def simulate_game(game):
+    """
+    Plays heads or tails or rock-paper-scissors many times and reports how the player's strategy fares.
+    - Accepts JSON with "rounds", and optionally "seed", "player" and "opponent" strategies and "confidence".
+    - Rounds are simulated in chunks, in parallel across cores for large runs; only aggregate counts are kept.
+    - Responds with win/tie/loss counts, rates and confidence intervals, plus the seed to reproduce the run.
+    """
+    # Imported here so NumPy only loads once the simulation API is used
+    import simulations
+    if game not in simulations.GAMES:
+        return jsonify(error=f"Unknown game. Choose one of: {', '.join(simulations.GAMES)}."), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(error="Expected a JSON object like {\"rounds\": 1000}."), 400
+    rounds = data.get("rounds")
+    seed = data.get("seed")
+    confidence = data.get("confidence", 0.95)
+    if not isinstance(rounds, int) or isinstance(rounds, bool) or not 1 <= rounds <= SIMULATION_MAX_ROUNDS:
+        return jsonify(error=f"\"rounds\" must be a whole number from 1 to {SIMULATION_MAX_ROUNDS}."), 400
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or not 0 <= seed < simulations.SEED_LIMIT):
+        return jsonify(error=f"\"seed\" must be a whole number from 0 to {simulations.SEED_LIMIT - 1}."), 400
+    if not isinstance(confidence, (int, float)) or not 0 < confidence < 1:
+        return jsonify(error="\"confidence\" must be between 0 and 1."), 400
+    processes = SIMULATION_PROCESSES or simulations.default_processes()
+    started = time.perf_counter()
+    try:
+        # In gevent workers the number crunching runs on the hub's thread pool, so other requests keep being served
+        result = run_blocking(
+            simulations.simulate,
+            game,
+            rounds,
+            player=data.get("player"),
+            opponent=data.get("opponent"),
+            seed=seed,
+            confidence=confidence,
+            chunk_rounds=SIMULATION_CHUNK_ROUNDS,
+            processes=processes if data.get("parallel", True) else 1
+        )
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return jsonify(result)
+
+
 # Gender Guesser
 @app.route(rule="/projects/gender-guesser", methods=["GET", "POST"])
+@page_cache.cached_get
 def gender_guesser():
     """
     Predicts the gender based on a given name using an external API.
@@ -286,9 +800,10 @@ def gender_guesser():
         api_params = {
             "name": name
         }
-        genderize_response = requests.get(GENDERIZE_API_ENDPOINT, params=api_params)
-        genderize_response.raise_for_status()
-        genderize_data = genderize_response.json()
+        try:
+            genderize_data = upstream_json("GET", GENDERIZE_API_ENDPOINT, params=api_params)
+        except UPSTREAM_ERRORS:
+            return render_template(template_name_or_list="gender-guesser.html", GENDER_DATA="N/A")
         gender_data = genderize_data["gender"]
         gender_probability = genderize_data["probability"]
         try:
@@ -301,6 +816,7 @@ def gender_guesser():
 
 # Age Guesser
 @app.route(rule="/projects/age-guesser", methods=["GET", "POST"])
+@page_cache.cached_get
 def age_guesser():
     """
     Predicts the age based on a given name using an external API.
@@ -313,9 +829,10 @@ def age_guesser():
         api_params = {
             "name": name
         }
-        ageify_response = requests.get(AGEIFY_API_ENDPOINT, params=api_params)
-        ageify_response.raise_for_status()
-        ageify_data = ageify_response.json()
+        try:
+            ageify_data = upstream_json("GET", AGEIFY_API_ENDPOINT, params=api_params)
+        except UPSTREAM_ERRORS:
+            return render_template(template_name_or_list="age-guesser.html", AGE_DATA="N/A")
         age_data = ageify_data["age"]
         if age_data == None:
             age_data = "N/A"
@@ -323,8 +840,110 @@ def age_guesser():
     return render_template(template_name_or_list="age-guesser.html")
 
 
+def fetch_name_batch(endpoint, names):
+    """
+    Looks up several names in one upstream request using the multi-name query form (name[]=...).
+    Runs in a worker thread, so it returns (records, stale) rather than flagging the request.
+    """
+    return upstream_lookup("GET", endpoint, params={"name[]": names})
+
+
+# Name Insights API
+@app.route(rule="/api/name-insights", methods=["POST"])
+def name_insights():
+    """
+    Predicts gender, probability and age for many names at once.
+    - Expects a JSON body like {"names": ["Anna", "Ben"]}.
+    - Names are grouped into batches and the genderize and agify batches are fetched concurrently.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(error="Expected a JSON object like {\"names\": [...]}."), 400
+    names = data.get("names")
+    if not isinstance(names, list) or not names or not all(isinstance(name, str) and name.strip() for name in names):
+        return jsonify(error="Expected a non-empty list of names under \"names\"."), 400
+    if len(names) > NAME_INSIGHTS_MAX_NAMES:
+        return jsonify(error=f"At most {NAME_INSIGHTS_MAX_NAMES} names can be looked up per request."), 400
+
+    started = time.perf_counter()
+    unique_names = list(dict.fromkeys(name.strip() for name in names))
+    batches = [unique_names[i:i + NAME_INSIGHTS_BATCH_SIZE] for i in range(0, len(unique_names), NAME_INSIGHTS_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=min(NAME_INSIGHTS_MAX_WORKERS, 2 * len(batches))) as executor:
+        gender_futures = [executor.submit(fetch_name_batch, GENDERIZE_API_ENDPOINT, batch) for batch in batches]
+        age_futures = [executor.submit(fetch_name_batch, AGEIFY_API_ENDPOINT, batch) for batch in batches]
+        try:
+            gender_results = [future.result() for future in gender_futures]
+            age_results = [future.result() for future in age_futures]
+        except UPSTREAM_ERRORS as error:
+            return jsonify(error=f"Upstream lookup failed: {error}"), 502
+    # Both APIs answer in the order the names were sent, so a short answer can't be matched back to its names
+    for batch, (gender_records, _), (age_records, _) in zip(batches, gender_results, age_results):
+        if not all(isinstance(records, list) and len(records) == len(batch) for records in (gender_records, age_records)):
+            return jsonify(error=f"Upstream lookup returned the wrong number of records for a batch of {len(batch)} names."), 502
+    genders = [record for records, _ in gender_results for record in records]
+    ages = [record for records, _ in age_results for record in records]
+    stale = any(batch_stale for _, batch_stale in gender_results + age_results)
+
+    insights = {}
+    for name, gender_record, age_record in zip(unique_names, genders, ages):
+        insights[name] = {
+            "name": name,
+            "gender": gender_record.get("gender"),
+            "probability": gender_record.get("probability"),
+            "age": age_record.get("age")
+        }
+    elapsed = time.perf_counter() - started
+    return jsonify(
+        results=[insights[name.strip()] for name in names],
+        upstream_requests=2 * len(batches),
+        elapsed_seconds=round(elapsed, 4),
+        names_per_second=round(len(names) / elapsed, 2) if elapsed else None,
+        stale=stale
+    )
+
+
+def geocode(city, state_country):
+    """
+    Resolves a city to a list of OpenWeatherMap-style geocoding results.
+    - Answers from the offline gazetteer when it knows the city and its state.
+    - Falls back to the OpenWeatherMap geocoding API on a miss or an incomplete record (no state name);
+      an incomplete record is still used if the API fails or finds nothing.
+    """
+    local_data = None
+    if gazetteer is not None:
+        local_data = gazetteer.lookup(city, state_country)
+        if local_data is not None and local_data["state"]:
+            return [local_data]
+    api_params = {
+        "q": f"{city}, {state_country}", 
+        "appid": OPENWEATHERMAP_API_KEY
+    }
+    try:
+        geocoding_data = upstream_json("GET", GEOCODING_API_ENDPOINT, params=api_params)
+    except UPSTREAM_ERRORS:
+        if local_data is None:
+            raise
+        return [local_data]
+    if not geocoding_data and local_data is not None:
+        return [local_data]
+    return geocoding_data
+
+
+# City Search API
+@app.route(rule="/api/cities")
+def city_search():
+    """
+    Suggests cities from the offline gazetteer whose name starts with the `q` query parameter.
+    """
+    prefix = request.args.get("q", "")
+    if gazetteer is None:
+        return jsonify(results=[])
+    return jsonify(results=gazetteer.prefix_search(prefix, limit=10))
+
+
 # City Coordinates Finder
 @app.route(rule="/projects/city-coordinates-finder", methods=["GET", "POST"])
+@page_cache.cached_get
 def city_coordinates_finder():
     """
     Finds and displays the coordinates (latitude and longitude) of a given city.
@@ -336,17 +955,11 @@ def city_coordinates_finder():
             data = request.form
             city = data["city"]
             state_country = data["state-country"]
-            api_params = {
-                "q": f"{city}, {state_country}", 
-                "appid": OPENWEATHERMAP_API_KEY
-            }
-            geocoding_response = requests.get(GEOCODING_API_ENDPOINT, params=api_params)
-            geocoding_response.raise_for_status()
-            geocoding_data = geocoding_response.json()
+            geocoding_data = geocode(city=city, state_country=state_country)
             result_data = geocoding_data[0]
             result_city = result_data["name"]
             result_country = result_data["country"]
-            result_state = result_data["state"]
+            result_state = result_data.get("state", "")
             result_latitude = result_data["lat"]
             result_longitude = result_data["lon"]
             result_location = f"Location: {result_city}, State: {result_state}, Country: {result_country}"
@@ -356,11 +969,121 @@ def city_coordinates_finder():
             return render_template(template_name_or_list="city_coordinates_finder.html")
         except IndexError:
             return render_template(template_name_or_list="city_coordinates_finder.html")
+        except UPSTREAM_ERRORS:
+            return render_template(template_name_or_list="city_coordinates_finder.html")
     return render_template(template_name_or_list="city_coordinates_finder.html")
 
 
+ForecastRow = collections.namedtuple("ForecastRow", ["hour", "weather", "description", "temp", "feels_like", "temp_min", "temp_max", "humidity", "wind_speed"])
+
+# Precomputed forecast rows per rounded (lat, lon): {key: [expires_at, hits, rows]}
+forecast_memory = {}
+forecast_refreshing = set()
+forecast_lock = threading.Lock()
+
+
+def next_forecast_slot(now):
+    """
+    Returns the Unix time at which the provider's current 3-hour forecast slot ends.
+    """
+    return (int(now) // FORECAST_SLOT_SECONDS + 1) * FORECAST_SLOT_SECONDS
+
+
+def build_forecast_rows(openweathermap_data):
+    """
+    Flattens the OpenWeatherMap forecast into rows the template can print directly.
+    Hour labels come from each entry's own timestamp in the city's local time.
+    """
+    utc_offset = openweathermap_data.get("city", {}).get("timezone", 0)
+    rows = []
+    for entry in openweathermap_data["list"]:
+        local_hour = datetime.datetime.fromtimestamp(entry["dt"] + utc_offset, tz=datetime.timezone.utc).hour
+        rows.append(ForecastRow(
+            hour=f"{local_hour % 12 or 12}:00 {'AM' if local_hour < 12 else 'PM'}",
+            weather=entry["weather"][0]["main"],
+            description=entry["weather"][0]["description"],
+            temp=entry["main"]["temp"],
+            feels_like=entry["main"]["feels_like"],
+            temp_min=entry["main"]["temp_min"],
+            temp_max=entry["main"]["temp_max"],
+            humidity=entry["main"]["humidity"],
+            wind_speed=entry["wind"]["speed"]
+        ))
+    return rows
+
+
+def fetch_forecast_rows(key):
+    """
+    Fetches the forecast for a rounded (lat, lon) and stores its rows until the current slot ends.
+    Goes through the shared cache, so one worker's fetch serves the others.
+    """
+    openweathermap_api_params = {
+        "lat": key[0], 
+        "lon": key[1], 
+        "appid": OPENWEATHERMAP_API_KEY, 
+        "units": "imperial", 
+        "cnt": 8
+    }
+    now = time.time()
+    expires_at = next_forecast_slot(now)
+    openweathermap_data, stale = upstream_lookup("GET", OPENWEATHERMAP_API_ENDPOINT, params=openweathermap_api_params, ttl=lambda data: expires_at - now)
+    if stale:
+        # Not memoized, so the next request retries the upstream and still shows the stale notice
+        mark_stale()
+        return build_forecast_rows(openweathermap_data)
+    rows = build_forecast_rows(openweathermap_data)
+    with forecast_lock:
+        hits = forecast_memory.get(key, [0, 0, None])[1]
+        forecast_memory[key] = [expires_at, hits, rows]
+        if len(forecast_memory) > FORECAST_MEMORY_MAX_ENTRIES:
+            # Dicts keep insertion order, so this drops the oldest entry
+            forecast_memory.pop(next(iter(forecast_memory)))
+    return rows
+
+
+def refresh_forecast(key, slot_end):
+    """
+    Re-fetches a popular location just after its slot ends.
+    Fetching before the boundary would return a list that starts at the boundary, a past hour for the whole next slot.
+    """
+    try:
+        time.sleep(max(0, slot_end - time.time()) + FORECAST_REFRESH_DELAY_SECONDS)
+        fetch_forecast_rows(key)
+    except UPSTREAM_ERRORS:
+        app.logger.warning("Forecast refresh failed for %s", key)
+    finally:
+        with forecast_lock:
+            forecast_refreshing.discard(key)
+
+
+def get_forecast_rows(latitude, longitude):
+    """
+    Returns precomputed forecast rows for a location.
+    - Repeat lookups within the same 3-hour slot are a dictionary hit.
+    - Popular locations are refreshed in the background as soon as their slot ends.
+    """
+    key = (round(latitude, FORECAST_COORDINATE_DECIMALS), round(longitude, FORECAST_COORDINATE_DECIMALS))
+    now = time.time()
+    with forecast_lock:
+        entry = forecast_memory.get(key)
+        if entry is not None and entry[0] > now:
+            entry[1] += 1
+            refresh = (entry[0] - now < FORECAST_REFRESH_AHEAD_SECONDS and entry[1] >= FORECAST_POPULAR_HITS
+                       and key not in forecast_refreshing)
+            if refresh:
+                forecast_refreshing.add(key)
+        else:
+            entry = None
+    if entry is None:
+        return fetch_forecast_rows(key)
+    if refresh:
+        threading.Thread(target=refresh_forecast, args=(key, entry[0]), daemon=True).start()
+    return entry[2]
+
+
 # 24 Hour Weather Forecaster
 @app.route(rule="/projects/weather-forecaster", methods=["GET", "POST"])
+@page_cache.cached_get
 def weather_forecaster():
     """
     Fetches and displays the 24-hour weather forecast for a specified city.
@@ -370,57 +1093,34 @@ def weather_forecaster():
     forecast = False
     if request.method == "POST":
         forecast = True
-        # Generate forecast hours dynamically
-        hour1 = f"{(datetime.datetime.now() + datetime.timedelta(hours=3)).hour % 12}:00"
-        hour2 = f"{(datetime.datetime.now() + datetime.timedelta(hours=6)).hour % 12}:00"
-        hour3 = f"{(datetime.datetime.now() + datetime.timedelta(hours=9)).hour % 12}:00"
-        hour4 = f"{(datetime.datetime.now() + datetime.timedelta(hours=12)).hour % 12}:00"
-        hour5 = f"{(datetime.datetime.now() + datetime.timedelta(hours=15)).hour % 12}:00"
-        hour6 = f"{(datetime.datetime.now() + datetime.timedelta(hours=18)).hour % 12}:00"
-        hour7 = f"{(datetime.datetime.now() + datetime.timedelta(hours=21)).hour % 12}:00"
-        hour8 = f"{(datetime.datetime.now() + datetime.timedelta(hours=24)).hour % 12}:00"
-        hours = [hour1, hour2, hour3, hour4, hour5, hour6, hour7, hour8]
-        
         data = request.form
         city = data["city"]
         state_country = data["state-country"]
         
-        # Fetch city coordinates
-        geocoding_api_params = {
-            "q": f"{city}, {state_country}", 
-            "appid": OPENWEATHERMAP_API_KEY
-        }
-        geocoding_response = requests.get(GEOCODING_API_ENDPOINT, params=geocoding_api_params)
-        geocoding_response.raise_for_status()
-        geocoding_data = geocoding_response.json()
-        result_data = geocoding_data[0]
-        result_city = result_data["name"]
-        result_country = result_data["country"]
-        result_state = result_data["state"]
-        result_latitude = float(result_data["lat"])
-        result_longitude = float(result_data["lon"])
-        result_location = f"Location: {result_city}, State: {result_state}, Country: {result_country}"
-        
-        # Fetch weather forecast
-        openweathermap_api_params = {
-            "lat": result_latitude, 
-            "lon": result_longitude, 
-            "appid": OPENWEATHERMAP_API_KEY, 
-            "units": "imperial", 
-            "cnt": 8
-        }
-        openweathermap_response = requests.get(OPENWEATHERMAP_API_ENDPOINT, params=openweathermap_api_params)
-        openweathermap_response.raise_for_status()
-        openweathermap_data = openweathermap_response.json()
-        results = openweathermap_data["list"]
+        try:
+            # Fetch city coordinates
+            geocoding_data = geocode(city=city, state_country=state_country)
+            result_data = geocoding_data[0]
+            result_city = result_data["name"]
+            result_country = result_data["country"]
+            result_state = result_data.get("state", "")
+            result_latitude = float(result_data["lat"])
+            result_longitude = float(result_data["lon"])
+            result_location = f"Location: {result_city}, State: {result_state}, Country: {result_country}"
+            
+            # Fetch weather forecast
+            rows = get_forecast_rows(latitude=result_latitude, longitude=result_longitude)
+        except (KeyError, IndexError, *UPSTREAM_ERRORS):
+            return render_template(template_name_or_list="weather-forecaster.html", FORECAST=False, RESULT_LOCATION="Location: N/A")
         
-        return render_template(template_name_or_list="weather-forecaster.html", FORECAST=forecast, RESULT_LOCATION=result_location, HOURS=hours, RESULTS=results)
+        return render_template(template_name_or_list="weather-forecaster.html", FORECAST=forecast, RESULT_LOCATION=result_location, ROWS=rows)
     
     return render_template(template_name_or_list="weather-forecaster.html", FORECAST=forecast)
 
 
 # Workout Calculator
 @app.route(rule="/projects/workout-calculator", methods=["GET", "POST"])
+@page_cache.cached_get
 def workout_calculator():
     calculate_workout = None
     if request.method == "POST":
@@ -440,16 +1140,95 @@ def workout_calculator():
                 "height_cm": height_cm,
                 "age": age
             }
-            nutritionix_response = requests.post(url=NUTRITIONIX_ENDPOINT, headers=NUTRITIONIX_HEADERS, json=nutritionix_params)
-            nutritionix_result = nutritionix_response.json()
+            nutritionix_result = upstream_json("POST", NUTRITIONIX_ENDPOINT, json_body=nutritionix_params, headers=NUTRITIONIX_HEADERS)
             result = nutritionix_result["exercises"][0]
             calculate_workout = True
             return render_template(template_name_or_list="workout-calculator.html", CALCULATE_WORKOUT=calculate_workout, RESULT=result)
-        except ValueError:
+        except (ValueError, KeyError, IndexError, *UPSTREAM_ERRORS):
             calculate_workout = False
             return render_template(template_name_or_list="workout-calculator.html", CALCULATE_WORKOUT=calculate_workout)
     return render_template(template_name_or_list="workout-calculator.html", CALCULATE_WORKOUT=calculate_workout)
 
 
+
+def fetch_exercises(nutritionix_params):
+    # Runs in the bulk log's worker threads, so the stale flag travels with the answer
+    return upstream_lookup("POST", NUTRITIONIX_ENDPOINT, json_body=nutritionix_params, headers=NUTRITIONIX_HEADERS)
+
+
+# Bulk Workout Log API
+@app.route(rule="/api/bulk/workout-log", methods=["POST"])
+def bulk_workout_log():
+    """
+    Calculates calories for a whole workout log.
+    - Accepts CSV or NDJSON (body or "file" upload) with weight, height_feet, height_inches, age and query per row,
+      plus an optional person column so people with the same measurements aren't combined.
+    - Rows for the same person are combined into multi-exercise queries, sent concurrently.
+    - Streams one NDJSON or CSV record per exercise (?format=csv|ndjson; defaults to the input format).
+    """
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    mimetype = upload.mimetype if upload else request.mimetype
+    filename = (upload.filename or "") if upload else ""
+    if mimetype in ("application/x-ndjson", "application/jsonl") or filename.endswith((".ndjson", ".jsonl")):
+        rows = bulk_workouts.iter_ndjson_rows(stream)
+        input_format = "ndjson"
+    elif mimetype == "text/csv" or filename.endswith(".csv"):
+        rows = bulk_workouts.iter_csv_rows(stream)
+        input_format = "csv"
+    else:
+        return jsonify(error="Send the workout log as text/csv or application/x-ndjson."), 415
+    output_format = request.args.get("format", input_format)
+    results = bulk_workouts.iter_results(
+        rows,
+        fetch=fetch_exercises,
+        chunk_rows=WORKOUT_BULK_CHUNK_ROWS,
+        queries_per_call=WORKOUT_BULK_QUERIES_PER_CALL,
+        concurrency=WORKOUT_BULK_CONCURRENCY
+    )
+    response_mimetype = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(bulk_workouts.encode_results(results, output_format)), mimetype=response_mimetype)
+
+
+def compile_templates():
+    """
+    Compiles every template, filling the bytecode cache. Returns how many there were.
+    """
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_up(preload_modules=False):
+    """
+    Prepares a freshly started process before it takes traffic; gunicorn.conf.py calls it.
+    - Compiles every template and pre-renders every page-cached GET route into the page cache.
+    - preload_modules also imports the lazily loaded modules, for the gunicorn master to share with its workers.
+    - Returns timings in milliseconds for the startup report.
+    """
+    started = time.perf_counter()
+    if preload_modules:
+        import bulk_calculators  # noqa: F401 (loads NumPy once, before the workers fork)
+        import simulations  # noqa: F401
+    templates = compile_templates()
+    compiled = time.perf_counter()
+    pages = 0
+    for rule in app.url_map.iter_rules():
+        view = app.view_functions[rule.endpoint]
+        if not getattr(view, "page_cached", False) or rule.arguments or "GET" not in rule.methods:
+            continue
+        # Calls the view directly, so no request hooks (outbox sender, metrics, profiling) run in the warmup
+        with app.test_request_context(rule.rule, method="GET"):
+            view()
+        pages += 1
+    return {
+        "templates": templates,
+        "compile_ms": round((compiled - started) * 1000, 1),
+        "pages": pages,
+        "render_ms": round((time.perf_counter() - compiled) * 1000, 1)
+    }
+
+
 if __name__ == "__main__":
     app.run(debug=False)
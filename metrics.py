@@ -0,0 +1,96 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+
+# Buckets from 5 ms to 2 minutes (gunicorn's timeout)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_SECONDS = Histogram("portfolio_request_seconds", "Time to handle a request, by Flask endpoint and method.", ["endpoint", "method"], buckets=LATENCY_BUCKETS)
+REQUEST_RENDER_SECONDS = Histogram("portfolio_request_render_seconds", "Time a request spent rendering templates.", ["endpoint"], buckets=LATENCY_BUCKETS)
+REQUEST_IO_SECONDS = Histogram("portfolio_request_io_seconds", "Time a request spent waiting on upstream calls.", ["endpoint"], buckets=LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge("portfolio_requests_in_flight", "Requests currently being handled.", ["endpoint"], multiprocess_mode="livesum")
+REQUEST_ERRORS = Counter("portfolio_request_errors_total", "Requests that raised, by exception type.", ["endpoint", "exception"])
+UPSTREAM_SECONDS = Histogram("portfolio_upstream_seconds", "Time per outbound call, by upstream.", ["upstream"], buckets=LATENCY_BUCKETS)
+UPSTREAM_IN_FLIGHT = Gauge("portfolio_upstream_in_flight", "Outbound calls currently waiting, by upstream.", ["upstream"], multiprocess_mode="livesum")
+WORKER_BOOT_SECONDS = Gauge("portfolio_worker_boot_seconds", "Startup cost per worker, by phase (app load, warmup, fork to ready).", ["phase"], multiprocess_mode="liveall")
+UPSTREAM_ERRORS = Counter("portfolio_upstream_errors_total", "Outbound calls that raised, by upstream and exception type.", ["upstream", "exception"])
+
+
+@contextmanager
+def track_upstream(upstream):
+    """
+    Times one outbound call and adds it to the current request's I/O time.
+    """
+    UPSTREAM_IN_FLIGHT.labels(upstream).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as error:
+        UPSTREAM_ERRORS.labels(upstream, type(error).__name__).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_SECONDS.labels(upstream).observe(elapsed)
+        UPSTREAM_IN_FLIGHT.labels(upstream).dec()
+        # Calls made from helper threads have no request to charge
+        if has_request_context() and "metrics_io_seconds" in g:
+            g.metrics_io_seconds += elapsed
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_io_seconds = 0.0
+    g.metrics_render_seconds = 0.0
+    g.metrics_endpoint = _endpoint()
+    REQUESTS_IN_FLIGHT.labels(g.metrics_endpoint).inc()
+
+
+def _finish_request(error):
+    if "metrics_started" not in g:
+        return
+    endpoint = g.metrics_endpoint
+    REQUEST_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - g.metrics_started)
+    REQUEST_RENDER_SECONDS.labels(endpoint).observe(g.metrics_render_seconds)
+    REQUEST_IO_SECONDS.labels(endpoint).observe(g.metrics_io_seconds)
+    REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+    if error is not None:
+        REQUEST_ERRORS.labels(endpoint, type(error).__name__).inc()
+
+
+def _start_render(sender, template, context, **extra):
+    g.metrics_render_started = time.perf_counter()
+
+
+def _finish_render(sender, template, context, **extra):
+    if "metrics_render_started" in g and "metrics_render_seconds" in g:
+        g.metrics_render_seconds += time.perf_counter() - g.metrics_render_started
+
+
+def init_app(app):
+    """
+    Registers the request, error and template render timing hooks on the app.
+    """
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_finish_render, app)
+
+
+def render_latest():
+    """
+    Returns (body, content type) for the /metrics endpoint.
+    Under gunicorn every worker writes to PROMETHEUS_MULTIPROC_DIR, so the numbers are aggregated across workers.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,283 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import nullcontext
+from blocking import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """
+    Durable email outbox backed by a local SQLite spool.
+    - enqueue() appends a message to the spool and returns immediately.
+    - A background sender thread per process drains the spool over one persistent, reused SMTP session.
+    - Failed sends are retried with exponential backoff; rows survive worker restarts because they live on disk.
+    - Rows are claimed with a lease, so several gunicorn workers can drain the same spool without sending twice;
+      the lease is renewed before each send, so it only has to outlast one send, not a whole batch.
+    - Send counters live in the spool too, so stats() reports totals across workers.
+    - In gevent workers every spool query runs on the hub's thread pool, so waiting on the SQLite write lock
+      only stalls the caller, not every request in the worker.
+    """
+
+    def __init__(self, spool_path, smtp_host, smtp_port=587, smtp_starttls=True, username=None, password=None,
+                 batch_size=20, max_attempts=8, backoff_seconds=5, poll_seconds=2, idle_seconds=60, smtp_timeout=30,
+                 lease_seconds=None, track_send=None):
+        self.spool_path = spool_path
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.smtp_starttls = smtp_starttls
+        self.username = username
+        self.password = password
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.smtp_timeout = smtp_timeout
+        # One send may have to connect, STARTTLS, log in and transmit, each bounded by the SMTP timeout
+        self.lease_seconds = lease_seconds or 5 * smtp_timeout
+        # Optional factory for a context manager wrapped around every SMTP send (used for metrics)
+        self.track_send = track_send or nullcontext
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._sender_pid = None
+        self._smtp = None
+        self._smtp_last_used = 0.0
+        self._init_spool()
+
+    def _connect_spool(self):
+        connection = sqlite3.connect(self.spool_path, timeout=10, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _spool(self, work):
+        """
+        Runs work(connection) on a fresh spool connection, off the gevent hub when there is one.
+        """
+        def run():
+            connection = self._connect_spool()
+            try:
+                return work(connection)
+            finally:
+                connection.close()
+        return run_blocking(run)
+
+    def _init_spool(self):
+        spool_dir = os.path.dirname(self.spool_path)
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        with self._connect_spool() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "from_addr TEXT NOT NULL, "
+                "to_addrs TEXT NOT NULL, "
+                "msg TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, "
+                "claimed_until REAL NOT NULL DEFAULT 0, "
+                "failed_at REAL, "
+                "last_error TEXT)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (failed_at, next_attempt_at)")
+            connection.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def enqueue(self, from_addr, to_addrs, msg):
+        """
+        Appends a message to the spool and wakes the sender. Returns the spool row id.
+        """
+        now = time.time()
+        row_id = self._spool(lambda connection: connection.execute(
+            "INSERT INTO outbox (from_addr, to_addrs, msg, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+            (from_addr, to_addrs, msg, now, now)
+        ).lastrowid)
+        self.ensure_started()
+        self._wakeup.set()
+        return row_id
+
+    def ensure_started(self):
+        """
+        Starts the sender thread for this process if it isn't running yet (threads don't survive a fork).
+        """
+        pid = os.getpid()
+        if self._sender_pid == pid:
+            return
+        with self._start_lock:
+            if self._sender_pid == pid:
+                return
+            self._smtp = None
+            self._wakeup = threading.Event()
+            thread = threading.Thread(target=self._run, name="outbox-sender", daemon=True)
+            thread.start()
+            self._sender_pid = pid
+
+    def depth(self):
+        """
+        Returns the number of messages still waiting to be sent.
+        """
+        return self._spool(lambda connection: connection.execute("SELECT COUNT(*) FROM outbox WHERE failed_at IS NULL").fetchone()[0])
+
+    def stats(self):
+        """
+        Returns spool depth, dead letters and send counters and latencies (in seconds) across all workers.
+        """
+        def read(connection):
+            dead_letters = connection.execute("SELECT COUNT(*) FROM outbox WHERE failed_at IS NOT NULL").fetchone()[0]
+            return dead_letters, dict(connection.execute("SELECT name, value FROM stats").fetchall())
+
+        dead_letters, counters = self._spool(read)
+        sent = int(counters.get("sent", 0))
+        return {
+            "spool_depth": self.depth(),
+            "dead_letters": dead_letters,
+            "sent": sent,
+            "failed_attempts": int(counters.get("failed_attempts", 0)),
+            "last_send_seconds": counters.get("last_send_seconds"),
+            "average_send_seconds": counters["total_send_seconds"] / sent if sent else None,
+            "last_queue_seconds": counters.get("last_queue_seconds")
+        }
+
+    def _record_stats(self, connection, counts, latest=None):
+        # Counters are added to; "latest" values replace the previous worker's
+        connection.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            counts.items()
+        )
+        connection.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (latest or {}).items()
+        )
+
+    def _claim_batch(self):
+        """
+        Leases up to batch_size due rows. Returns them with the lease expiry each was claimed with.
+        """
+        return self._spool(self._lease_due_rows)
+
+    def _lease_due_rows(self, connection):
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT id, from_addr, to_addrs, msg, created_at, attempts FROM outbox "
+                "WHERE failed_at IS NULL AND next_attempt_at <= ? AND claimed_until <= ? "
+                "ORDER BY id LIMIT ?",
+                (now, now, self.batch_size)
+            ).fetchall()
+            connection.executemany(
+                "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                [(now + self.lease_seconds, row[0]) for row in rows]
+            )
+            connection.execute("COMMIT")
+            return [(row, now + self.lease_seconds) for row in rows]
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _get_smtp(self):
+        import smtplib  # deferred until the first send, keeping worker boot fast
+        if self._smtp is not None and time.time() - self._smtp_last_used > self.idle_seconds:
+            # The server has most likely dropped an idle session by now
+            self._close_smtp()
+        if self._smtp is None:
+            connection = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.smtp_timeout)
+            if self.smtp_starttls:
+                connection.starttls()  # Secure the connection
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+            self._smtp = connection
+        return self._smtp
+
+    def _close_smtp(self):
+        import smtplib
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _renew_lease(self, connection, row_id, claimed_until):
+        """
+        Extends a row's lease for one more send. Returns the new expiry, or None when the lease already
+        ran out and another worker may have claimed the row.
+        """
+        now = time.time()
+        if claimed_until <= now:
+            return None
+        renewed_until = now + self.lease_seconds
+        cursor = connection.execute(
+            "UPDATE outbox SET claimed_until = ? WHERE id = ? AND claimed_until = ?",
+            (renewed_until, row_id, claimed_until)
+        )
+        return renewed_until if cursor.rowcount else None
+
+    def _send_batch(self, rows):
+        import smtplib
+        for (row_id, from_addr, to_addrs, msg, created_at, attempts), claimed_until in rows:
+            if self._spool(lambda connection: self._renew_lease(connection, row_id, claimed_until)) is None:
+                logger.warning("Outbox lease on message %s expired before it was sent; leaving it to be reclaimed", row_id)
+                continue
+            started = time.perf_counter()
+            try:
+                with self.track_send():
+                    self._get_smtp().sendmail(from_addr=from_addr, to_addrs=to_addrs, msg=msg)
+            except (smtplib.SMTPException, OSError) as error:
+                if isinstance(error, (smtplib.SMTPServerDisconnected, OSError)):
+                    self._smtp = None
+                logger.warning("Outbox send failed for message %s (attempt %s): %s", row_id, attempts + 1, error)
+                self._spool(lambda connection: self._record_failure(connection, row_id, attempts, error))
+                continue
+            elapsed = time.perf_counter() - started
+            self._smtp_last_used = time.time()
+            self._spool(lambda connection: self._record_sent(connection, row_id, elapsed, created_at))
+
+    def _record_sent(self, connection, row_id, elapsed, created_at):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            self._record_stats(
+                connection,
+                {"sent": 1, "total_send_seconds": elapsed},
+                {"last_send_seconds": elapsed, "last_queue_seconds": time.time() - created_at}
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _record_failure(self, connection, row_id, attempts, error):
+        attempts += 1
+        now = time.time()
+        self._record_stats(connection, {"failed_attempts": 1})
+        if attempts >= self.max_attempts:
+            connection.execute(
+                "UPDATE outbox SET attempts = ?, failed_at = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                (attempts, now, str(error), row_id)
+            )
+        else:
+            connection.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                (attempts, now + self.backoff_seconds * 2 ** (attempts - 1), str(error), row_id)
+            )
+
+    def _run(self):
+        while True:
+            try:
+                rows = self._claim_batch()
+                if rows:
+                    # Keep draining while bursts are arriving, reusing the same SMTP session
+                    self._send_batch(rows)
+                    continue
+                if self._smtp is not None and time.time() - self._smtp_last_used > self.idle_seconds:
+                    self._close_smtp()
+            except Exception:
+                logger.exception("Outbox sender loop failed")
+            # Other workers' messages and retries that come due are picked up by polling
+            self._wakeup.wait(timeout=self.poll_seconds)
+            self._wakeup.clear()
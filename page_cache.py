@@ -0,0 +1,109 @@
+import datetime
+import functools
+import gzip
+import hashlib
+import os
+import threading
+import time
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CachedPage:
+    __slots__ = ("version", "body", "etag", "gzip_body", "brotli_body", "mimetype")
+
+    def __init__(self, version, body, mimetype):
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        # mtime=0 keeps the gzip bytes identical across workers and restarts
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.brotli_body = brotli.compress(body, quality=11) if brotli is not None else None
+
+
+class PageCache:
+    """
+    Caches the rendered bytes of pages whose output only depends on the templates and the current year.
+    - Each page is rendered once and stored with precompressed gzip/brotli variants; each encoding has its own
+      strong ETag, since the bytes differ.
+    - If-None-Match requests are answered with 304 without rendering anything.
+    - Entries are invalidated when a file under the template folder changes or the year rolls over.
+    """
+
+    def __init__(self, template_folder, check_interval=2):
+        self.template_folder = template_folder
+        self.check_interval = check_interval
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+
+    def version(self):
+        """
+        Returns (newest template mtime, current year), re-checked at most every check_interval seconds.
+        """
+        now = time.time()
+        if now >= self._next_check:
+            newest = 0.0
+            for directory, _, filenames in os.walk(self.template_folder):
+                for filename in filenames:
+                    newest = max(newest, os.stat(os.path.join(directory, filename)).st_mtime)
+            self._version = (newest, datetime.datetime.now().year)
+            self._next_check = now + self.check_interval
+        return self._version
+
+    def store(self, key, response):
+        page = CachedPage(self.version(), response.get_data(), response.mimetype)
+        with self._lock:
+            self._pages[key] = page
+        return page
+
+    def cached_get(self, view):
+        """
+        Decorator serving a view's plain GET requests from the cache; other requests run the view as usual.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or request.args:
+                return view(*args, **kwargs)
+            key = request.path
+            page = self._pages.get(key)
+            if page is None or page.version != self.version():
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response):
+                    response = Response(response)
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                page = self.store(key, response)
+            return self.respond(page)
+        # Lets the startup warmup find the pages worth pre-rendering
+        wrapper.page_cached = True
+        return wrapper
+
+    def respond(self, page):
+        headers = {
+            "Vary": "Accept-Encoding",
+            # Browsers may keep the page but must revalidate, which costs a 304 at most
+            "Cache-Control": "no-cache"
+        }
+        body = page.body
+        etag = page.etag
+        accepted = request.accept_encodings
+        if page.brotli_body is not None and accepted["br"]:
+            body = page.brotli_body
+            etag += "-br"
+            headers["Content-Encoding"] = "br"
+        elif accepted["gzip"]:
+            body = page.gzip_body
+            etag += "-gz"
+            headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = f"\"{etag}\""
+        if request.if_none_match.contains(etag):
+            headers.pop("Content-Encoding", None)
+            return Response(status=304, headers=headers)
+        return Response(body, mimetype=page.mimetype, headers=headers)
@@ -0,0 +1,227 @@
+import _thread
+import hmac
+import itertools
+import os
+import sys
+import time
+from collections import Counter
+from flask import g, request
+
+# Leaf frames of helper threads that are just waiting for work; they would bury the interesting stacks
+IDLE_LEAVES = {("threading.py", "wait"), ("thread.py", "_worker"), ("selectors.py", "select")}
+
+
+def _native_thread_tools():
+    """
+    Returns (start_new_thread, sleep, get_ident, allocate_lock) that use real OS threads even when gevent
+    has patched them, so the sampler keeps running while the profiled greenlet hogs the CPU.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is not None and monkey.is_module_patched("threading"):
+        return (monkey.get_original("_thread", "start_new_thread"), monkey.get_original("time", "sleep"),
+                monkey.get_original("_thread", "get_ident"), monkey.get_original("_thread", "allocate_lock"))
+    return _thread.start_new_thread, time.sleep, _thread.get_ident, _thread.allocate_lock
+
+
+def _greenlet_for_request():
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is not None and monkey.is_module_patched("threading"):
+        import gevent
+        return gevent.getcurrent()
+    return None
+
+
+class _Sampler:
+    """
+    Wall-clock stack sampler for one request, so time blocked in requests/smtplib sockets shows up as well as CPU.
+    - Sync workers: samples the request thread plus any busy helper threads (name lookups, outbox sender).
+    - Gevent workers: samples only the request's greenlet, whether it is running or parked on I/O.
+    """
+
+    def __init__(self, root_path, interval):
+        self.root_path = root_path
+        self.interval = interval
+        self.stacks = Counter()
+        self._running = True
+        self._labels = {}
+        start_new_thread, self._sleep, get_ident, allocate_lock = _native_thread_tools()
+        self._get_ident = get_ident
+        self._request_ident = get_ident()
+        self._greenlet = _greenlet_for_request()
+        self._done = allocate_lock()
+        self._done.acquire()
+        start_new_thread(self._run, ())
+
+    def stop(self):
+        self._running = False
+        # Wait for the last sample so the counter isn't read while it's being written
+        self._done.acquire()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            if path.startswith(self.root_path):
+                path = os.path.relpath(path, self.root_path)
+            else:
+                path = os.path.basename(path)
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+        return label
+
+    def _stack(self, frame, prefix=None):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if prefix:
+            labels.append(prefix)
+        return ";".join(reversed(labels))
+
+    def _sample(self, sampler_ident):
+        frames = sys._current_frames()
+        if self._greenlet is not None:
+            # A parked greenlet keeps its frame in gr_frame; a running one is the thread's current frame
+            frame = self._greenlet.gr_frame or frames.get(self._request_ident)
+            if frame is not None:
+                self.stacks[self._stack(frame)] += 1
+            return
+        for ident, frame in frames.items():
+            if ident == self._request_ident:
+                self.stacks[self._stack(frame)] += 1
+            elif ident != sampler_ident:
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+                self.stacks[self._stack(frame, prefix=f"thread {ident}")] += 1
+
+    def _run(self):
+        sampler_ident = self._get_ident()
+        try:
+            while self._running:
+                self._sample(sampler_ident)
+                self._sleep(self.interval)
+        finally:
+            self._done.release()
+
+
+class RequestProfiler:
+    """
+    Opt-in sampling profiler for individual requests.
+    - Profiles one request in sample_every, and any request whose profile header carries the secret.
+    - Each profile is written to output_dir as a collapsed-stack file (flamegraph.pl, speedscope and
+      inferno all read it); only the newest ring_size files are kept.
+    - When neither sampling nor a secret is configured no hooks are registered, so it costs nothing.
+    - Sampling needs the secret too: without it the captured profiles could never be read, so it stays off.
+    """
+
+    def __init__(self, output_dir, sample_every=0, secret=None, interval=0.005, ring_size=200, header="X-Profile"):
+        self.output_dir = output_dir
+        self.sample_every = sample_every
+        self.secret = secret
+        self.interval = interval
+        self.ring_size = ring_size
+        self.header = header
+        self.root_path = None
+        self._counter = itertools.count(1)
+
+    @property
+    def enabled(self):
+        return bool(self.sample_every or self.secret)
+
+    def init_app(self, app, skip_endpoints=()):
+        if self.sample_every and not self.secret:
+            app.logger.warning("Request profiling is off: sampling needs a secret to read the profiles back")
+            self.sample_every = 0
+        if not self.enabled:
+            return
+        self.root_path = app.root_path + os.sep
+        self.skip_endpoints = {"static", *skip_endpoints}
+        os.makedirs(self.output_dir, exist_ok=True)
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+    def is_authorized(self, supplied):
+        """
+        Tells whether a header or query value matches the secret, in constant time.
+        """
+        return bool(self.secret and supplied) and hmac.compare_digest(supplied.encode(), self.secret.encode())
+
+    def _should_profile(self):
+        if request.endpoint in self.skip_endpoints:
+            return False
+        if self.is_authorized(request.headers.get(self.header)):
+            return True
+        return bool(self.sample_every) and next(self._counter) % self.sample_every == 0
+
+    def _start_request(self):
+        if not self._should_profile():
+            return
+        g.profile_id = f"{time.time_ns()}-{os.getpid()}"
+        g.profile_started = time.perf_counter()
+        g.profile_status = 500
+        g.profile_sampler = _Sampler(self.root_path, self.interval)
+
+    def _record_status(self, response):
+        if "profile_sampler" in g:
+            g.profile_status = response.status_code
+            response.headers["X-Profile-Id"] = g.profile_id
+        return response
+
+    def _finish_request(self, error):
+        sampler = g.pop("profile_sampler", None)
+        if sampler is None:
+            return
+        sampler.stop()
+        duration_us = int((time.perf_counter() - g.profile_started) * 1_000_000)
+        name = f"{g.profile_id}-{duration_us}-{g.profile_status}-{request.method}-{request.endpoint or 'unmatched'}.collapsed"
+        path = os.path.join(self.output_dir, name)
+        with open(path + ".tmp", "w") as file:
+            for stack, count in sampler.stacks.items():
+                file.write(f"{stack} {count}\n")
+        os.replace(path + ".tmp", path)
+        self._trim()
+
+    def _files(self):
+        try:
+            return sorted(name for name in os.listdir(self.output_dir) if name.endswith(".collapsed"))
+        except FileNotFoundError:
+            return []
+
+    def _trim(self):
+        files = self._files()
+        # Names start with a nanosecond timestamp, so the oldest sort first
+        for name in files[:max(0, len(files) - self.ring_size)]:
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+            except FileNotFoundError:
+                pass  # another worker trimmed it first
+
+    def slowest(self, limit=50):
+        """
+        Returns the captured profiles, slowest first, as dicts parsed from their file names.
+        """
+        profiles = []
+        for name in self._files():
+            timestamp_ns, pid, duration_us, status, method, endpoint = name[:-len(".collapsed")].split("-", 5)
+            profiles.append({
+                "id": f"{timestamp_ns}-{pid}",
+                "file": name,
+                "captured_at": int(timestamp_ns) / 1_000_000_000,
+                "pid": int(pid),
+                "duration_ms": int(duration_us) / 1000,
+                "status": int(status),
+                "method": method,
+                "endpoint": endpoint
+            })
+        profiles.sort(key=lambda profile: profile["duration_ms"], reverse=True)
+        return profiles[:limit]
+
+    def find(self, profile_id):
+        """
+        Returns the file name for a profile id (as sent back in X-Profile-Id), or None.
+        """
+        for name in self._files():
+            if name.startswith(profile_id + "-"):
+                return name
+        return None
@@ -0,0 +1,245 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from blocking import run_blocking
+
+
+class SharedCache:
+    """
+    Response cache shared by every worker process through one SQLite file in WAL mode.
+    - Entries carry their own expiry, so each upstream endpoint can use its own TTL.
+    - Expired entries are kept (until evicted) so callers can fall back to them as stale data.
+    - The least recently used entries are evicted once the cache holds more than max_entries; an entry's
+      last access is only rewritten once per touch_seconds, so most hits are a read with no write lock taken.
+    - get_or_fetch() is single-flight: concurrent misses for one key, in any worker, trigger exactly one fetch.
+    - Hit/miss counters live in the same file, so stats() reports totals across workers. Each process
+      batches its counts in memory and writes them every stats_flush_every counts or stats_flush_seconds.
+    - Triggers keep a running entry count, so set() never has to count the table.
+    - In gevent workers every query runs on the hub's thread pool, so a busy wait on the write lock
+      only stalls the request that is waiting.
+    """
+
+    def __init__(self, path, max_entries=10000, flight_timeout=15, poll_seconds=0.05, touch_seconds=60,
+                 stats_flush_every=100, stats_flush_seconds=5):
+        self.path = path
+        self.max_entries = max_entries
+        self.flight_timeout = flight_timeout
+        self.poll_seconds = poll_seconds
+        self.touch_seconds = touch_seconds
+        self.stats_flush_every = stats_flush_every
+        self.stats_flush_seconds = stats_flush_seconds
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending_stats = Counter()
+        self._stats_pid = os.getpid()
+        self._stats_flushed_at = time.time()
+        # Striped locks keep same-key callers in this process queued without a lock per key
+        self._flight_locks = [threading.Lock() for _ in range(64)]
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        connection.execute("CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, deadline REAL NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Seeded from the table once, for cache files written before the count was kept
+            connection.execute("INSERT OR IGNORE INTO stats (name, value) SELECT 'entries', COUNT(*) FROM entries")
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries "
+                "BEGIN UPDATE stats SET value = value + 1 WHERE name = 'entries'; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries "
+                "BEGIN UPDATE stats SET value = value - 1 WHERE name = 'entries'; END"
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _connection(self):
+        # One connection per thread and per process; SQLite connections must not cross a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, name, amount=1):
+        now = time.time()
+        with self._stats_lock:
+            if self._stats_pid != os.getpid():
+                # Counts inherited through a fork belong to the parent
+                self._pending_stats.clear()
+                self._stats_pid = os.getpid()
+            self._pending_stats[name] += amount
+            due = (sum(self._pending_stats.values()) >= self.stats_flush_every
+                   or now - self._stats_flushed_at >= self.stats_flush_seconds)
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Writes this process's batched hit/miss/eviction counts to the shared file.
+        """
+        with self._stats_lock:
+            pending = self._pending_stats if self._stats_pid == os.getpid() else Counter()
+            self._pending_stats = Counter()
+            self._stats_pid = os.getpid()
+            self._stats_flushed_at = time.time()
+        if pending:
+            run_blocking(self._write_stats, pending)
+
+    def _write_stats(self, pending):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                pending.items()
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _entry_count(self, connection):
+        return connection.execute("SELECT value FROM stats WHERE name = 'entries'").fetchone()[0]
+
+    def get(self, key, allow_stale=False):
+        """
+        Returns (value, is_stale) for a cached key, or None on a miss.
+        Expired entries are only returned when allow_stale is set.
+        """
+        return run_blocking(self._get, key, allow_stale)
+
+    def _get(self, key, allow_stale):
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute("SELECT value, expires_at, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        is_stale = row[1] <= now
+        if is_stale and not allow_stale:
+            return None
+        if now - row[2] >= self.touch_seconds:
+            connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), is_stale
+
+    def set(self, key, value, ttl):
+        evicted = run_blocking(self._set, key, value, ttl)
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        connection = self._connection()
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the count trigger
+        connection.execute(
+            "INSERT INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at, last_access = excluded.last_access",
+            (key, json.dumps(value), now + ttl, now)
+        )
+        return self._evict(connection)
+
+    def _evict(self, connection):
+        """
+        Deletes the least recently used entries beyond max_entries and returns how many were deleted.
+        """
+        overflow = self._entry_count(connection) - self.max_entries
+        if overflow <= 0:
+            return 0
+        connection.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+            (overflow,)
+        )
+        return overflow
+
+    def _claim_flight(self, key, flight_timeout):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT deadline FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                connection.execute("COMMIT")
+                return False
+            connection.execute("INSERT OR REPLACE INTO flights (key, deadline) VALUES (?, ?)", (key, now + flight_timeout))
+            connection.execute("COMMIT")
+            return True
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _release_flight(self, key):
+        self._connection().execute("DELETE FROM flights WHERE key = ?", (key,))
+
+    def _flight_lock(self, key):
+        return self._flight_locks[hash(key) % len(self._flight_locks)]
+
+    def get_or_fetch(self, key, fetch, ttl, flight_timeout=None):
+        """
+        Returns the cached value for key, calling fetch() on a miss.
+        - ttl is either a number of seconds or a function of the fetched value, so "no result" answers can get a shorter (negative) TTL.
+        - Only one caller across all workers runs fetch() for a key at a time; the rest wait for its result.
+        - flight_timeout (default: the cache's) is how long the others wait; it should cover fetch()'s worst case,
+          retries included, or they give up on a slow leader and all fetch at once.
+        """
+        flight_timeout = flight_timeout or self.flight_timeout
+        cached = self.get(key)
+        if cached is not None:
+            self._count("hits")
+            return cached[0]
+        # Threads in this process queue on a lock; other processes coordinate through the flights table
+        with self._flight_lock(key):
+            deadline = time.time() + flight_timeout
+            while True:
+                cached = self.get(key)
+                if cached is not None:
+                    self._count("hits")
+                    return cached[0]
+                if run_blocking(self._claim_flight, key, flight_timeout):
+                    break
+                if time.time() >= deadline:
+                    # The leader is stuck or gone; fetch ourselves rather than wait forever
+                    break
+                time.sleep(self.poll_seconds)
+            self._count("misses")
+            try:
+                value = fetch()
+                self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            finally:
+                run_blocking(self._release_flight, key)
+            return value
+
+    def stats(self):
+        """
+        Returns hit/miss/eviction counts across all workers plus the current entry count.
+        Other workers' most recent counts may not have been flushed yet.
+        """
+        self.flush_stats()
+        counters = run_blocking(lambda: dict(self._connection().execute("SELECT name, value FROM stats").fetchall()))
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": counters["entries"],
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None
+        }
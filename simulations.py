@@ -0,0 +1,166 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+from blocking import gevent_patched
+
+OUTCOME_NAMES = ["loss", "tie", "win"]
+LOSS, TIE, WIN = range(3)
+# Seeds stay below 2**53 so they survive JSON parsers that read numbers as doubles (JavaScript included)
+SEED_LIMIT = 2 ** 53
+
+# Outcome tables indexed [player move, opponent move], replacing the if/elif comparisons
+GAMES = {
+    "heads-or-tails": {
+        # The player calls a side and wins when the coin lands on it
+        "moves": ["Heads", "Tails"],
+        "outcomes": np.array([[WIN, LOSS],
+                              [LOSS, WIN]], dtype=np.int8)
+    },
+    "rock-paper-scissors": {
+        "moves": ["Rock", "Paper", "Scissors"],
+        "outcomes": np.array([[TIE, LOSS, WIN],
+                              [WIN, TIE, LOSS],
+                              [LOSS, WIN, TIE]], dtype=np.int8)
+    }
+}
+
+_pool = None
+
+
+def parse_strategy(game, spec):
+    """
+    Validates a strategy and returns it as (kind, numpy parameter):
+    - {"type": "random"}: uniform over the moves (the default, and how the computer plays).
+    - {"type": "fixed", "move": "Rock"}: always the same move.
+    - {"type": "weighted", "weights": {"Rock": 2, "Paper": 1}}: moves drawn in proportion to their weights.
+    - {"type": "cycle", "sequence": ["Rock", "Paper"]}: the sequence repeated, starting at round 0.
+    Raises ValueError with a message for the client.
+    """
+    moves = GAMES[game]["moves"]
+    spec = spec or {"type": "random"}
+    if not isinstance(spec, dict):
+        raise ValueError("A strategy must be an object with a \"type\".")
+    kind = spec.get("type", "random")
+
+    def move_index(move):
+        if move not in moves:
+            raise ValueError(f"Unknown move {move!r}. Choose one of: {', '.join(moves)}.")
+        return moves.index(move)
+
+    if kind == "random":
+        return "random", None
+    if kind == "fixed":
+        return "fixed", np.int8(move_index(spec.get("move")))
+    if kind == "weighted":
+        weights = spec.get("weights")
+        if not isinstance(weights, dict) or not weights:
+            raise ValueError("A weighted strategy needs \"weights\", an object of move: weight.")
+        probabilities = np.zeros(len(moves))
+        for move, weight in weights.items():
+            if not isinstance(weight, (int, float)) or weight < 0 or not math.isfinite(weight):
+                raise ValueError("Weights must be non-negative numbers.")
+            probabilities[move_index(move)] = weight
+        if probabilities.sum() == 0:
+            raise ValueError("At least one weight must be positive.")
+        return "weighted", np.cumsum(probabilities / probabilities.sum())
+    if kind == "cycle":
+        sequence = spec.get("sequence")
+        if not isinstance(sequence, list) or not sequence:
+            raise ValueError("A cycle strategy needs \"sequence\", a non-empty list of moves.")
+        return "cycle", np.array([move_index(move) for move in sequence], dtype=np.int8)
+    raise ValueError("Strategy type must be one of: random, fixed, weighted, cycle.")
+
+
+def draw_moves(strategy, move_count, first_round, rounds, generator):
+    kind, parameter = strategy
+    if kind == "random":
+        return generator.integers(0, move_count, size=rounds, dtype=np.int8)
+    if kind == "fixed":
+        return np.full(rounds, parameter, dtype=np.int8)
+    if kind == "weighted":
+        # Inverse CDF sampling; min() guards against the last cumulative sum rounding just below 1
+        return np.minimum(np.searchsorted(parameter, generator.random(rounds), side="right"), move_count - 1).astype(np.int8)
+    return parameter[(first_round + np.arange(rounds)) % len(parameter)]
+
+
+def simulate_chunk(game, player, opponent, seed, chunk_index, first_round, rounds):
+    """
+    Plays one chunk of rounds and returns the move-pair counts as a flat array (player move * moves + opponent move).
+    Each chunk draws from its own stream spawned from the seed, so results only depend on the seed and chunk size.
+    """
+    move_count = len(GAMES[game]["moves"])
+    generator = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(chunk_index,))))
+    player_moves = draw_moves(player, move_count, first_round, rounds, generator)
+    opponent_moves = draw_moves(opponent, move_count, first_round, rounds, generator)
+    pairs = player_moves.astype(np.intp) * move_count + opponent_moves
+    return np.bincount(pairs, minlength=move_count * move_count)
+
+
+def get_pool(processes):
+    """
+    Returns the shared process pool, started on first use ("spawn", so no worker threads or sockets are inherited).
+    """
+    global _pool
+    if _pool is None:
+        import multiprocessing
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def wilson_interval(successes, trials, z):
+    """
+    Wilson score interval for a proportion; unlike the normal approximation it stays within [0, 1].
+    """
+    if trials == 0:
+        return None, None
+    proportion = successes / trials
+    denominator = 1 + z ** 2 / trials
+    centre = (proportion + z ** 2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    low = 0.0 if successes == 0 else max(0.0, centre - margin)
+    high = 1.0 if successes == trials else min(1.0, centre + margin)
+    return low, high
+
+
+def simulate(game, rounds, player=None, opponent=None, seed=None, confidence=0.95, chunk_rounds=1_000_000, processes=1):
+    """
+    Plays `rounds` rounds of a game in chunks and returns aggregate counts with confidence intervals.
+    - Only one chunk of moves is held in memory per process; chunks run across `processes` cores when above 1,
+      except in gevent workers, where the process pool's helper threads would be greenlets and chunks run serially.
+    - seed (an integer) makes the run reproducible; without one, a fresh seed below SEED_LIMIT is drawn and returned.
+    """
+    player_strategy = parse_strategy(game, player)
+    opponent_strategy = parse_strategy(game, opponent)
+    if seed is None:
+        seed = int(np.random.default_rng().integers(SEED_LIMIT))
+    chunks = [
+        (game, player_strategy, opponent_strategy, seed, index, first_round, min(chunk_rounds, rounds - first_round))
+        for index, first_round in enumerate(range(0, rounds, chunk_rounds))
+    ]
+    move_count = len(GAMES[game]["moves"])
+    pair_counts = np.zeros(move_count * move_count, dtype=np.int64)
+    if processes > 1 and len(chunks) > 1 and not gevent_patched():
+        for counts in get_pool(processes).map(simulate_chunk, *zip(*chunks)):
+            pair_counts += counts
+    else:
+        for chunk in chunks:
+            pair_counts += simulate_chunk(*chunk)
+
+    pair_counts = pair_counts.reshape(move_count, move_count)
+    outcome_counts = np.bincount(GAMES[game]["outcomes"].ravel(), weights=pair_counts.ravel(), minlength=len(OUTCOME_NAMES))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    moves = GAMES[game]["moves"]
+    result = {"game": game, "rounds": rounds, "seed": seed, "chunk_rounds": chunk_rounds, "confidence": confidence, "outcomes": {}}
+    for index, name in enumerate(OUTCOME_NAMES):
+        count = int(outcome_counts[index])
+        low, high = wilson_interval(count, rounds, z)
+        result["outcomes"][name] = {"count": count, "rate": count / rounds if rounds else None, "interval": [low, high]}
+    result["player_moves"] = dict(zip(moves, pair_counts.sum(axis=1).tolist()))
+    result["opponent_moves"] = dict(zip(moves, pair_counts.sum(axis=0).tolist()))
+    return result
+
+
+def default_processes():
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
@@ -0,0 +1,67 @@
+import argparse
+import socketserver
+import threading
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks just enough SMTP to accept and discard messages, standing in for Gmail when testing offline.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost SMTP sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if command in ("HELO", "EHLO"):
+                self.reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                message = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    message.append(data_line)
+                self.server.record(b"".join(message))
+                self.reply("250 OK: queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=1025, verbose=False):
+        super().__init__((host, port), SMTPSinkHandler)
+        self.verbose = verbose
+        self.messages_received = 0
+        self._lock = threading.Lock()
+
+    def record(self, message):
+        with self._lock:
+            self.messages_received += 1
+        if self.verbose:
+            print(message.decode(errors="replace"), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP sink that accepts and discards mail.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--verbose", action="store_true", help="print every received message")
+    args = parser.parse_args()
+    with SMTPSink(host=args.host, port=args.port, verbose=args.verbose) as sink:
+        print(f"SMTP sink listening on {args.host}:{args.port}", flush=True)
+        sink.serve_forever()
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# main.py reads its storage paths at import time, so point them at a scratch directory before any test imports it
+STATE_DIR = tempfile.mkdtemp(prefix="portfolio-tests-")
+os.environ.setdefault("OUTBOX_SPOOL_PATH", os.path.join(STATE_DIR, "outbox.sqlite3"))
+os.environ.setdefault("UPSTREAM_CACHE_PATH", os.path.join(STATE_DIR, "upstream-cache.sqlite3"))
+os.environ.setdefault("JINJA_CACHE_DIR", os.path.join(STATE_DIR, "jinja-cache"))
+os.environ.setdefault("GAZETTEER_INDEX_PATH", os.path.join(STATE_DIR, "missing-gazetteer.idx"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+import gzip
+import pytest
+import main
+from build_assets import build, content_hash, precompress
+from flask import url_for
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_text("body { color: black; }\n" * 50)
+    monkeypatch.setattr(main.app, "static_folder", str(tmp_path))
+    return tmp_path
+
+
+def test_content_hash_changes_with_content(tmp_path):
+    path = tmp_path / "style.css"
+    path.write_text("body { color: black; }")
+    first = content_hash(str(path))
+    path.write_text("body { color: white; }")
+    assert len(first) == 12
+    assert content_hash(str(path)) != first
+
+
+def test_precompress_writes_decodable_siblings(tmp_path):
+    path = tmp_path / "script.js"
+    path.write_bytes(b"console.log('hello');\n" * 20)
+    precompress(str(path))
+    assert gzip.decompress((tmp_path / "script.js.gz").read_bytes()) == path.read_bytes()
+
+
+def test_static_urls_point_at_fingerprinted_copy(static_dir, monkeypatch):
+    manifest = build(str(static_dir))
+    monkeypatch.setattr(main, "asset_manifest", manifest)
+    fingerprinted = manifest["files"]["css/style.css"]
+    assert fingerprinted.startswith("dist/css/style.") and fingerprinted.endswith(".css")
+    with main.app.test_request_context():
+        assert url_for("static", filename="css/style.css") == f"/static/{fingerprinted}"
+        # Files missing from the manifest are served as they are
+        assert url_for("static", filename="js/missing.js") == "/static/js/missing.js"
+
+
+def test_fingerprinted_assets_are_immutable_and_precompressed(static_dir, monkeypatch):
+    manifest = build(str(static_dir))
+    monkeypatch.setattr(main, "asset_manifest", manifest)
+    url = f"/static/{manifest['files']['css/style.css']}"
+    client = main.app.test_client()
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert plain.headers["Cache-Control"] == main.ASSET_CACHE_CONTROL
+    assert "Content-Encoding" not in plain.headers
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Cache-Control"] == main.ASSET_CACHE_CONTROL
+    assert compressed.mimetype == "text/css"
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    plain.close()
+    compressed.close()
+
+
+def test_unfingerprinted_assets_keep_default_caching(static_dir):
+    response = main.app.test_client().get("/static/css/style.css")
+    assert response.headers.get("Cache-Control") != main.ASSET_CACHE_CONTROL
+    response.close()
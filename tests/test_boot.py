@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("numpy", "bulk_calculators", "simulations", "smtplib")
+
+
+def run_fresh(tmp_path, script):
+    # What a module import loads can only be seen from an interpreter that hasn't imported main yet
+    path = tmp_path / "check.py"
+    path.write_text(textwrap.dedent(script))
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, JINJA_CACHE_DIR=str(tmp_path / "jinja-cache"))
+    result = subprocess.run([sys.executable, str(path)], cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_main_defers_heavy_modules(tmp_path):
+    loaded = run_fresh(tmp_path, f"""
+        import json
+        import sys
+        import main
+        print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))
+    """)
+    assert loaded == []
+
+
+def test_warm_up_compiles_templates_and_fills_page_cache(tmp_path):
+    report = run_fresh(tmp_path, """
+        import json
+        import os
+        import sys
+        import main
+        report = main.warm_up()
+        report["template_count"] = len(main.app.jinja_env.list_templates())
+        report["bytecode_files"] = len(os.listdir(main.JINJA_CACHE_DIR))
+        report["cached_pages"] = sorted(main.page_cache._pages)
+        report["numpy_loaded"] = "numpy" in sys.modules
+        print(json.dumps(report))
+    """)
+    assert report["templates"] == report["template_count"] > 0
+    assert report["bytecode_files"] == report["templates"]
+    assert report["pages"] == len(report["cached_pages"]) > 0
+    assert "/projects" in report["cached_pages"]
+    assert not report["numpy_loaded"]
+
+
+def test_preloading_imports_lazy_modules(tmp_path):
+    loaded = run_fresh(tmp_path, """
+        import json
+        import sys
+        import main
+        main.warm_up(preload_modules=True)
+        print(json.dumps(sorted(name for name in ("numpy", "bulk_calculators", "simulations") if name in sys.modules)))
+    """)
+    assert loaded == ["bulk_calculators", "numpy", "simulations"]
@@ -0,0 +1,51 @@
+import main
+from bulk_calculators import compute_chunk, parse_column
+
+
+def test_clean_columns_are_parsed_in_one_go():
+    numbers, errors = parse_column(["1", " 2.5 ", 3], False, False)
+    assert numbers.tolist() == [1.0, 2.5, 3.0]
+    assert errors == {}
+
+
+def test_bad_cells_get_per_cell_messages():
+    _, errors = parse_column(["2", "abc", None, "nan", "2.5", "-1", "0"], True, True)
+    assert errors == {
+        1: "must be a number",
+        2: "must be a number",
+        3: "must be a finite number",
+        4: "must be a whole number",
+        5: "must be greater than zero",
+        6: "must be greater than zero"
+    }
+
+
+def test_rows_keep_their_inputs_and_errors():
+    results = compute_chunk("tip-calculator", {"bill": ["100", "x"], "tip": ["10", "10"], "people": ["2", "1.5"]}, 10)
+    assert results == [
+        {"row": 10, "bill": "100", "tip": "10", "people": "2", "bill_per_person": 55.0, "error": None},
+        {"row": 11, "bill": "x", "tip": "10", "people": "1.5", "bill_per_person": None,
+         "error": "bill must be a number; people must be a whole number"}
+    ]
+
+
+def test_degenerate_inputs_are_reported_as_row_errors():
+    results = compute_chunk("bmi-calculator", {"height_feet": ["0"], "height_inches": ["0"], "weight": ["150"]}, 0)
+    assert results[0]["bmi"] is None and results[0]["bmi_range"] is None
+    assert results[0]["error"] == "bmi could not be calculated"
+
+
+def test_invalid_utf8_is_reported_as_row_errors():
+    body = b"year\n2024\n\xff\xfe\n2023\n"
+    response = main.app.test_client().post("/api/bulk/leap-year-checker?format=json", data=body, content_type="text/csv")
+    results = response.get_json()["results"]
+    assert response.status_code == 200
+    assert [result["is_leap_year"] for result in results] == [True, None, False]
+    assert results[1]["error"] == "year must be a number"
+
+
+def test_ndjson_input_is_streamed_in_chunks():
+    body = b'{"year": 2000}\nnot json\n{"year": 1900}\n'
+    results = main.app.test_client().post("/api/bulk/leap-year-checker", data=body, content_type="application/x-ndjson").get_json()["results"]
+    assert [result["is_leap_year"] for result in results] == [True, None, False]
+    assert results[1]["error"] == "year must be a number"
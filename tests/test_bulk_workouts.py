@@ -0,0 +1,54 @@
+import json
+import main
+from bulk_workouts import group_chunk, iter_results
+
+ROW = {"weight": "150", "height_feet": "5", "height_inches": "10", "age": "30"}
+
+
+def test_rows_are_batched_per_person():
+    chunk = [
+        dict(ROW, person="ann", query="ran 3 miles"),
+        dict(ROW, person="bea", query="swam 20 minutes"),
+        dict(ROW, person="ann", query="cycled 10 km"),
+        dict(ROW, person="ann", query="walked 1 mile")
+    ]
+    batches, rejected = group_chunk(chunk, first_row=1, queries_per_call=2)
+    assert rejected == []
+    assert [[row_number for row_number, _ in rows] for _, rows in batches] == [[1, 3], [4], [2]]
+    # Without a person column the same measurements are taken to be one person
+    batches, _ = group_chunk([dict(row, person=None) for row in chunk], first_row=1, queries_per_call=10)
+    assert len(batches) == 1
+
+
+def test_combined_query_results_carry_their_rows():
+    queries = []
+
+    def fetch(params):
+        queries.append(params["query"])
+        return {"exercises": [{"name": name, "nf_calories": 100} for name in params["query"].split(" and ")]}, False
+
+    chunk = [dict(ROW, person="ann", query="ran 3 miles"), dict(ROW, person="ann", query="swam 20 minutes")]
+    results = list(iter_results(chunk, fetch, chunk_rows=10, queries_per_call=10, concurrency=2))
+    assert queries == ["ran 3 miles and swam 20 minutes"]
+    assert [(result["rows"], result["person"], result["exercise"]) for result in results] == [
+        ("0 1", "ann", "ran 3 miles"), ("0 1", "ann", "swam 20 minutes")
+    ]
+
+
+def test_invalid_rows_get_an_error_line(monkeypatch):
+    monkeypatch.setattr(main, "fetch_exercises", lambda params: ({"exercises": [{"name": "running"}]}, False))
+    body = (
+        b"weight,height_feet,height_inches,age,query\n"
+        b"abc,5,10,30,ran 3 miles\n"
+        b"150,5,10,30,\n"
+        b"150,5,10,30,ran \xff\xfe miles\n"
+        b"150,5,10,30,ran 3 miles\n"
+    )
+    response = main.app.test_client().post("/api/bulk/workout-log?format=ndjson", data=body, content_type="text/csv")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.status_code == 200
+    errors = {record["rows"]: record["error"] for record in records}
+    assert errors["0"].startswith("weight, height_feet")
+    assert errors["1"].startswith("weight, height_feet")
+    assert errors["2"] == "row is not valid UTF-8"
+    assert errors["3"] is None
@@ -0,0 +1,50 @@
+import pytest
+import main
+from circuit_breaker import CircuitBreaker
+
+
+def tripped_breaker(monkeypatch, clock):
+    monkeypatch.setattr("circuit_breaker.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=30)
+    breaker.record(failed=True, seconds=0.1)
+    breaker.record(failed=True, seconds=0.1)
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_only_the_probe_closes_a_half_open_breaker(monkeypatch):
+    clock = [100.0]
+    breaker = tripped_breaker(monkeypatch, clock)
+    clock[0] += 30
+    assert breaker.claim_probe()
+    assert not breaker.claim_probe()
+    # A late answer from a call made before the trip
+    breaker.record(failed=False, seconds=0.1)
+    assert breaker.state == "half_open"
+    breaker.record(failed=False, seconds=0.1, probe=True)
+    assert breaker.state == "closed"
+
+
+def test_a_lost_probe_can_be_claimed_again(monkeypatch):
+    clock = [100.0]
+    breaker = tripped_breaker(monkeypatch, clock)
+    clock[0] += 30
+    assert breaker.claim_probe()
+    clock[0] += 29
+    assert not breaker.claim_probe()
+    clock[0] += 1
+    assert breaker.claim_probe()
+
+
+def test_probe_failing_with_an_unexpected_error_reopens_the_breaker(monkeypatch):
+    breaker = main.upstream_breakers[main.GEOCODING_API_ENDPOINT]
+    monkeypatch.setattr(breaker, "state", "half_open")
+
+    def broken_request(*args, **kwargs):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(main, "upstream_request", broken_request)
+    with pytest.raises(RuntimeError):
+        main.fetch_upstream_json("GET", main.GEOCODING_API_ENDPOINT, probe=True)
+    assert breaker.state == "open"
+    monkeypatch.setattr(breaker, "state", "closed")
@@ -0,0 +1,54 @@
+import pytest
+import main
+from build_fonts import template_codepoints, unicode_range
+from markupsafe import Markup
+
+FONTS = [
+    {"family": "Poppins", "weight": 400, "file": "fonts/poppins-400.woff2", "unicode_range": "U+0020-007E", "preload": True},
+    {"family": "Poppins", "weight": 700, "file": "fonts/poppins-700.woff2", "unicode_range": "U+0020-007E", "preload": False}
+]
+SPRITE = Markup('<svg xmlns="http://www.w3.org/2000/svg" style="display: none"><symbol id="fa-bars" viewBox="0 0 448 512"><path d="M0 96h448"/></symbol></svg>')
+
+
+@pytest.fixture
+def render_projects(monkeypatch):
+    def render(fonts, sprite):
+        monkeypatch.setattr(main, "self_hosted_fonts", fonts)
+        monkeypatch.setattr(main, "icon_sprite", sprite)
+        # Pages rendered with the other asset set must not be served from the page cache
+        monkeypatch.setattr(main.page_cache, "_pages", {})
+        return main.app.test_client().get("/projects").get_data(as_text=True)
+    return render
+
+
+def test_unicode_range_merges_consecutive_codepoints():
+    assert unicode_range({0x41, 0x42, 0x43, 0x45, 0x20AC}) == "U+0041-0043, U+0045, U+20AC"
+    assert unicode_range(set()) == ""
+
+
+def test_template_codepoints_skip_markup_and_jinja(tmp_path):
+    (tmp_path / "page.html").write_text('<p class="xyz">Hé</p>{{ qq }}{% if jj %}{# kk #}', encoding="utf-8")
+    codepoints = {chr(codepoint) for codepoint in template_codepoints(str(tmp_path))}
+    assert {"H", "é"} <= codepoints
+    assert not codepoints & set("xyzqjk")
+
+
+def test_pages_use_self_hosted_fonts_and_inline_sprite(render_projects):
+    page = render_projects(FONTS, SPRITE)
+    assert '<link rel="preload" href="/static/fonts/poppins-400.woff2" as="font"' in page
+    assert "/static/fonts/poppins-700.woff2\" as=\"font\"" not in page
+    assert page.count("@font-face") == 2
+    assert '<symbol id="fa-bars"' in page
+    assert '<use href="#fa-bars">' in page
+    assert "fonts.googleapis.com" not in page
+    assert "boxicons.min.css" not in page
+    assert "kit.fontawesome.com" not in page
+
+
+def test_pages_fall_back_to_cdns_before_the_build(render_projects):
+    page = render_projects([], None)
+    assert "@font-face" not in page
+    assert "<symbol" not in page
+    assert "fonts.googleapis.com" in page
+    assert "boxicons.min.css" in page
+    assert "kit.fontawesome.com" in page
@@ -0,0 +1,38 @@
+import main
+
+
+def forecast_starting_at(dt):
+    return {"city": {"timezone": 0}, "list": [{
+        "dt": dt, "weather": [{"main": "Clear", "description": "clear sky"}],
+        "main": {"temp": 70, "feels_like": 70, "temp_min": 65, "temp_max": 75, "humidity": 40}, "wind": {"speed": 3}
+    }]}
+
+
+def test_refresh_runs_after_the_slot_boundary(monkeypatch):
+    slot = main.FORECAST_SLOT_SECONDS
+    boundary = 1000 * slot
+    clock = [boundary - 60]
+    fetched_at = []
+
+    def fake_lookup(method, url, params=None, json_body=None, headers=None, ttl=None):
+        fetched_at.append(clock[0])
+        # Like the provider, the list starts at the first slot boundary after the request
+        return forecast_starting_at(main.next_forecast_slot(clock[0])), False
+
+    def fake_sleep(seconds):
+        clock[0] += seconds
+
+    monkeypatch.setattr(main, "upstream_lookup", fake_lookup)
+    monkeypatch.setattr(main.time, "time", lambda: clock[0])
+    monkeypatch.setattr(main.time, "sleep", fake_sleep)
+    key = (1.0, 2.0)
+    main.fetch_forecast_rows(key)
+    main.forecast_refreshing.add(key)
+    main.refresh_forecast(key, main.forecast_memory[key][0])
+
+    assert fetched_at[-1] >= boundary
+    expires_at, _, rows = main.forecast_memory[key]
+    assert expires_at == boundary + slot
+    # Same first-row hour as a normal fetch made after the boundary
+    assert rows == main.build_forecast_rows(forecast_starting_at(boundary + slot))
+    assert key not in main.forecast_refreshing
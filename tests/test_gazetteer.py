@@ -0,0 +1,109 @@
+import pytest
+import main
+from gazetteer import Gazetteer, build_index
+
+CITIES = [
+    # geonameid, name, asciiname, alternatenames, lat, lon, class, code, country, cc2, admin1, admin2, admin3, admin4, population
+    ["2988507", "Paris", "Paris", "", "48.85341", "2.3488", "P", "PPLC", "FR", "", "11", "75", "", "", "2138551"],
+    ["4717560", "Paris", "Paris", "", "33.66094", "-95.55551", "P", "PPLA2", "US", "", "TX", "277", "", "", "24782"]
+]
+
+
+@pytest.fixture
+def index_without_admin1(tmp_path):
+    # No admin1CodesASCII.txt next to the dump, so no record gets a state name
+    cities_path = tmp_path / "cities.txt"
+    cities_path.write_text("".join("\t".join(columns) + "\n" for columns in CITIES), encoding="utf-8")
+    build_index(str(cities_path), str(tmp_path / "gazetteer.idx"))
+    return Gazetteer(str(tmp_path / "gazetteer.idx"))
+
+
+@pytest.fixture
+def client(monkeypatch, index_without_admin1):
+    monkeypatch.setattr(main, "gazetteer", index_without_admin1)
+    return main.app.test_client()
+
+
+def test_record_always_has_state(index_without_admin1):
+    record = index_without_admin1.lookup("Paris", "FR")
+    assert record["state"] == ""
+    assert record["country"] == "FR"
+
+
+def test_incomplete_record_falls_back_to_api(client, monkeypatch):
+    calls = []
+
+    def fake_upstream_json(method, url, params=None, **kwargs):
+        calls.append(url)
+        return [{"name": "Paris", "state": "Ile-de-France", "country": "FR", "lat": 48.8589, "lon": 2.32}]
+
+    monkeypatch.setattr(main, "upstream_json", fake_upstream_json)
+    response = client.post("/projects/city-coordinates-finder", data={"city": "Paris", "state-country": "FR"})
+    assert calls == [main.GEOCODING_API_ENDPOINT]
+    assert "State: Ile-de-France" in response.get_data(as_text=True)
+
+
+def test_city_finder_uses_incomplete_record_when_api_fails(client, monkeypatch):
+    def failing_upstream_json(*args, **kwargs):
+        raise main.requests.ConnectionError("down")
+
+    monkeypatch.setattr(main, "upstream_json", failing_upstream_json)
+    page = client.post("/projects/city-coordinates-finder", data={"city": "Paris", "state-country": "FR"}).get_data(as_text=True)
+    assert "Latitude: 48.85341, Longitude: 2.3488" in page
+    assert "Country: FR" in page
+
+
+def test_weather_forecaster_uses_incomplete_record_when_api_fails(client, monkeypatch):
+    def failing_upstream_json(*args, **kwargs):
+        raise main.requests.ConnectionError("down")
+
+    monkeypatch.setattr(main, "upstream_json", failing_upstream_json)
+    monkeypatch.setattr(main, "get_forecast_rows", lambda latitude, longitude: [])
+    page = client.post("/projects/weather-forecaster", data={"city": "Paris", "state-country": "FR"}).get_data(as_text=True)
+    assert "Location: Paris, State: , Country: FR" in page
+    assert "Location: N/A" not in page
+
+
+@pytest.fixture
+def index_with_names(tmp_path):
+    cities = CITIES + [
+        ["3448439", "São Paulo", "Sao Paulo", "", "-23.5475", "-46.63611", "P", "PPLA", "BR", "", "27", "", "", "", "10021295"],
+        ["2643743", "London", "London", "", "51.50853", "-0.12574", "P", "PPLC", "GB", "", "ENG", "", "", "", "8961989"],
+        ["6058560", "London", "London", "", "42.98339", "-81.23304", "P", "PPL", "CA", "", "08", "", "", "", "346765"],
+        ["2643123", "Londonderry", "Londonderry", "", "54.9981", "-7.30934", "P", "PPLA2", "GB", "", "NIR", "", "", "", "83652"]
+    ]
+    (tmp_path / "cities.txt").write_text("".join("\t".join(columns) + "\n" for columns in cities), encoding="utf-8")
+    (tmp_path / "admin1CodesASCII.txt").write_text("FR.11\tIle-de-France\nUS.TX\tTexas\nBR.27\tSao Paulo\n", encoding="utf-8")
+    (tmp_path / "countryInfo.txt").write_text("#ISO\tISO3\tISO-Numeric\tfips\tCountry\nFR\tFRA\t250\tFR\tFrance\n", encoding="utf-8")
+    build_index(str(tmp_path / "cities.txt"), str(tmp_path / "gazetteer.idx"))
+    return Gazetteer(str(tmp_path / "gazetteer.idx"))
+
+
+def test_lookup_by_state_country_code_and_name(index_with_names):
+    assert index_with_names.lookup("Paris", "TX")["country"] == "US"
+    assert index_with_names.lookup("Paris", "Texas")["state"] == "Texas"
+    assert index_with_names.lookup("Paris", "France")["country"] == "FR"
+    assert index_with_names.lookup("Paris", "FR")["state"] == "Ile-de-France"
+
+
+def test_lookup_ignores_case_accents_and_spacing(index_with_names):
+    record = index_with_names.lookup("  sao   PAULO ", "br")
+    assert record["name"] == "São Paulo"
+    assert index_with_names.lookup("São Paulo", "BR") == record
+
+
+def test_ambiguous_name_resolves_to_most_populous(index_with_names):
+    assert index_with_names.lookup("Paris", "")["country"] == "FR"
+    assert index_with_names.lookup("London", "")["country"] == "GB"
+
+
+def test_lookup_miss_returns_none(index_with_names):
+    assert index_with_names.lookup("Atlantis", "") is None
+    assert index_with_names.lookup("Paris", "DE") is None
+
+
+def test_prefix_search_ranks_by_population(index_with_names):
+    names = [(record["name"], record["country"]) for record in index_with_names.prefix_search("lond")]
+    assert names == [("London", "GB"), ("London", "CA"), ("Londonderry", "GB")]
+    assert len(index_with_names.prefix_search("lond", limit=1)) == 1
+    assert index_with_names.prefix_search("  ") == []
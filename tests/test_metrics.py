@@ -0,0 +1,45 @@
+import pytest
+import main
+import metrics
+from prometheus_client.parser import text_string_to_metric_families
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Reads this process's registry rather than a gunicorn multiprocess directory
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    return main.app.test_client()
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE_LATEST
+    return {family.name: family for family in text_string_to_metric_families(response.get_data(as_text=True))}
+
+
+def sample_value(family, suffix, **labels):
+    return sum(
+        sample.value for sample in family.samples
+        if sample.name == family.name + suffix and all(sample.labels.get(key) == value for key, value in labels.items())
+    )
+
+
+def test_request_histogram_is_labelled_by_route(client):
+    before = sample_value(scrape(client)["portfolio_request_seconds"], "_count", endpoint="projects", method="GET")
+    client.get("/projects")
+    families = scrape(client)
+    assert sample_value(families["portfolio_request_seconds"], "_count", endpoint="projects", method="GET") == before + 1
+    assert sample_value(families["portfolio_request_seconds"], "_bucket", endpoint="projects", method="GET", le="+Inf") == before + 1
+    assert sample_value(families["portfolio_request_render_seconds"], "_count", endpoint="projects") >= 1
+    assert sample_value(families["portfolio_request_io_seconds"], "_count", endpoint="projects") >= 1
+
+
+def test_upstream_calls_are_timed_and_errors_counted(client):
+    with main.app.test_request_context():
+        with pytest.raises(RuntimeError):
+            with metrics.track_upstream("https://upstream.test/fail"):
+                raise RuntimeError("down")
+    families = scrape(client)
+    assert sample_value(families["portfolio_upstream_seconds"], "_count", upstream="https://upstream.test/fail") >= 1
+    assert sample_value(families["portfolio_upstream_errors"], "_total", upstream="https://upstream.test/fail", exception="RuntimeError") >= 1
@@ -0,0 +1,32 @@
+import main
+
+
+def test_short_upstream_batch_is_a_bad_gateway(monkeypatch):
+    def fake_lookup(method, url, params=None, **kwargs):
+        names = params["name[]"]
+        if url == main.AGEIFY_API_ENDPOINT:
+            names = names[:-1]  # agify dropped a name
+        return [{"name": name, "gender": "female", "probability": 0.9, "age": 30} for name in names], False
+
+    monkeypatch.setattr(main, "upstream_lookup", fake_lookup)
+    response = main.app.test_client().post("/api/name-insights", json={"names": ["Anna", "Ben", "Cleo"]})
+    assert response.status_code == 502
+    assert "wrong number of records" in response.get_json()["error"]
+
+
+def test_complete_batches_are_matched_to_names(monkeypatch):
+    def fake_lookup(method, url, params=None, **kwargs):
+        return [{"name": name, "gender": "male", "probability": 0.5, "age": len(name)} for name in params["name[]"]], False
+
+    monkeypatch.setattr(main, "upstream_lookup", fake_lookup)
+    response = main.app.test_client().post("/api/name-insights", json={"names": ["Ben", " Anna", "Ben"]})
+    assert response.status_code == 200
+    assert [result["age"] for result in response.get_json()["results"]] == [3, 4, 3]
+
+
+def test_body_that_is_not_an_object_is_rejected():
+    client = main.app.test_client()
+    for body in (["a", "b"], 3, "x", None):
+        response = client.post("/api/name-insights", json=body)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
@@ -0,0 +1,100 @@
+import time
+from outbox import Outbox
+
+
+class FakeSMTP:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.sent = []
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        time.sleep(self.seconds)
+        self.sent.append(msg)
+
+
+def make_outbox(tmp_path, smtp, **kwargs):
+    outbox = Outbox(spool_path=str(tmp_path / "outbox.sqlite3"), smtp_host="localhost", **kwargs)
+    outbox._get_smtp = lambda: smtp
+    return outbox
+
+
+def spool(outbox, count):
+    connection = outbox._connect_spool()
+    try:
+        for index in range(count):
+            now = time.time()
+            connection.execute(
+                "INSERT INTO outbox (from_addr, to_addrs, msg, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                ("me@example.com", "me@example.com", f"message {index}", now, now)
+            )
+    finally:
+        connection.close()
+
+
+def test_lease_covers_a_send_not_a_batch(tmp_path):
+    outbox = make_outbox(tmp_path, FakeSMTP(), smtp_timeout=30)
+    assert outbox.lease_seconds >= 4 * 30
+
+
+def test_rows_whose_lease_expired_are_left_for_another_worker(tmp_path):
+    smtp = FakeSMTP(seconds=0.3)
+    outbox = make_outbox(tmp_path, smtp, lease_seconds=0.2)
+    spool(outbox, 2)
+    rows = outbox._claim_batch()
+    # The first send is renewed just before it starts; by the second the batch's lease has run out
+    other_worker = make_outbox(tmp_path, FakeSMTP(), lease_seconds=60)
+    outbox._send_batch(rows)
+    assert smtp.sent == ["message 0"]
+    assert [row[0][3] for row in other_worker._claim_batch()] == ["message 1"]
+
+
+def test_stats_are_shared_across_workers(tmp_path):
+    first = make_outbox(tmp_path, FakeSMTP(), batch_size=1)
+    second = make_outbox(tmp_path, FakeSMTP())
+    spool(first, 3)
+    first._send_batch(first._claim_batch())
+    second._send_batch(second._claim_batch())
+    for outbox in (first, second):
+        stats = outbox.stats()
+        assert stats["sent"] == 3
+        assert stats["spool_depth"] == 0
+        assert stats["average_send_seconds"] is not None
+
+
+class FailingSMTP:
+    def sendmail(self, from_addr, to_addrs, msg):
+        import smtplib
+        raise smtplib.SMTPDataError(451, "try again later")
+
+
+def test_failed_sends_back_off_then_become_dead_letters(tmp_path):
+    outbox = make_outbox(tmp_path, FailingSMTP(), max_attempts=2, backoff_seconds=5)
+    spool(outbox, 1)
+    outbox._send_batch(outbox._claim_batch())
+    connection = outbox._connect_spool()
+    attempts, next_attempt_at, claimed_until, failed_at = connection.execute(
+        "SELECT attempts, next_attempt_at, claimed_until, failed_at FROM outbox"
+    ).fetchone()
+    assert (attempts, claimed_until, failed_at) == (1, 0, None)
+    assert next_attempt_at >= time.time() + 4
+    # Not due yet, so no worker picks it up
+    assert outbox._claim_batch() == []
+
+    connection.execute("UPDATE outbox SET next_attempt_at = 0")
+    outbox._send_batch(outbox._claim_batch())
+    assert connection.execute("SELECT attempts, failed_at IS NOT NULL FROM outbox").fetchone() == (2, 1)
+    connection.close()
+    assert outbox._claim_batch() == []
+    stats = outbox.stats()
+    assert (stats["failed_attempts"], stats["dead_letters"], stats["spool_depth"]) == (2, 1, 0)
+
+
+def test_sender_thread_drains_enqueued_messages(tmp_path):
+    smtp = FakeSMTP()
+    outbox = make_outbox(tmp_path, smtp, poll_seconds=0.05)
+    outbox.enqueue("me@example.com", "me@example.com", "hello")
+    deadline = time.time() + 5
+    while outbox.depth() and time.time() < deadline:
+        time.sleep(0.05)
+    assert smtp.sent == ["hello"]
+    assert outbox.stats()["sent"] == 1
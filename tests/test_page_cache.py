@@ -0,0 +1,24 @@
+import time
+import main
+from page_cache import CachedPage
+
+
+def test_gzip_variant_is_identical_across_workers():
+    body = b"<html>" + b"page " * 500 + b"</html>"
+    first = CachedPage(None, body, "text/html")
+    time.sleep(1.1)  # gzip would otherwise embed a different mtime
+    assert CachedPage(None, body, "text/html").gzip_body == first.gzip_body
+
+
+def test_each_encoding_gets_its_own_etag():
+    client = main.app.test_client()
+    etags = {}
+    for encoding in ("identity", "gzip", "br"):
+        response = client.get("/projects", headers={"Accept-Encoding": encoding})
+        etags[encoding] = response.headers["ETag"]
+        revalidated = client.get("/projects", headers={"Accept-Encoding": encoding, "If-None-Match": etags[encoding]})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["ETag"] == etags[encoding]
+    assert len(set(etags.values())) == 3
+    # A gzip validator must not revalidate the uncompressed body
+    assert client.get("/projects", headers={"Accept-Encoding": "identity", "If-None-Match": etags["gzip"]}).status_code == 200
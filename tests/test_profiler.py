@@ -0,0 +1,37 @@
+import flask
+import main
+from profiler import RequestProfiler
+
+
+def test_profiles_are_only_readable_with_the_header(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.profiler, "secret", "s3cret")
+    monkeypatch.setattr(main.profiler, "output_dir", str(tmp_path))
+    (tmp_path / "1700000000000000000-42-1500-200-GET-home.collapsed").write_text("home (main.py:1) 3\n")
+    client = main.app.test_client()
+    assert client.get("/profiles?key=s3cret").status_code == 404
+    assert client.get("/profiles/1700000000000000000-42?key=s3cret").status_code == 404
+    page = client.get("/profiles", headers={"X-Profile": "s3cret"}).get_data(as_text=True)
+    assert "/profiles/1700000000000000000-42" in page
+    assert "s3cret" not in page
+    download = client.get("/profiles/1700000000000000000-42", headers={"X-Profile": "s3cret"})
+    assert download.get_data(as_text=True) == "home (main.py:1) 3\n"
+
+
+def test_profiled_requests_are_written_as_collapsed_stacks(tmp_path):
+    app = flask.Flask(__name__)
+    app.add_url_rule("/", "home", lambda: "ok")
+    profiler = RequestProfiler(str(tmp_path), secret="s3cret", interval=0.001)
+    profiler.init_app(app)
+    response = app.test_client().get("/", headers={"X-Profile": "s3cret"})
+    assert profiler.find(response.headers["X-Profile-Id"]) is not None
+    assert app.test_client().get("/").headers.get("X-Profile-Id") is None
+
+
+def test_sampling_without_a_secret_stays_off(tmp_path):
+    app = flask.Flask(__name__)
+    app.add_url_rule("/", "home", lambda: "ok")
+    profiler = RequestProfiler(str(tmp_path / "profiles"), sample_every=1)
+    profiler.init_app(app)
+    assert not profiler.enabled
+    assert app.test_client().get("/").headers.get("X-Profile-Id") is None
+    assert not (tmp_path / "profiles").exists()
@@ -0,0 +1,75 @@
+import threading
+import time
+from shared_cache import SharedCache
+
+
+def test_concurrent_misses_share_one_fetch(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    # Two instances on one file stand in for two worker processes
+    caches = [SharedCache(path), SharedCache(path)]
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.3)
+        return {"answer": 42}
+
+    def lookup(cache):
+        results.append(cache.get_or_fetch("key", fetch, 60))
+
+    threads = [threading.Thread(target=lookup, args=(caches[index % 2],)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 8
+
+
+def test_followers_wait_for_a_leader_slower_than_the_default_timeout(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    leader, follower = SharedCache(path, flight_timeout=0.1), SharedCache(path, flight_timeout=0.1)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.4)
+        return "slow"
+
+    thread = threading.Thread(target=leader.get_or_fetch, args=("key", fetch, 60), kwargs={"flight_timeout": 2})
+    thread.start()
+    time.sleep(0.1)
+    assert follower.get_or_fetch("key", fetch, 60, flight_timeout=2) == "slow"
+    thread.join()
+    assert len(calls) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), max_entries=3, touch_seconds=0)
+    for index in range(3):
+        cache.set(f"key{index}", index, 60)
+        time.sleep(0.01)
+    cache.set("key1", "updated", 60)  # an overwrite doesn't grow the cache
+    time.sleep(0.01)
+    cache.get("key0")  # now the most recently used
+    cache.set("key3", 3, 60)
+    cache.set("key4", 4, 60)
+    assert cache.get("key2") is None
+    assert cache.get("key1") is None
+    assert cache.get("key0") == (0, False)
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 2
+
+
+def test_stats_are_batched_and_flushed(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SharedCache(path, stats_flush_every=1000, stats_flush_seconds=3600)
+    cache.set("key", "value", 60)
+    for _ in range(5):
+        cache.get_or_fetch("key", lambda: "unused", 60)
+    other_worker = SharedCache(path)
+    assert other_worker.stats()["hits"] == 0
+    assert cache.stats()["hits"] == 5
+    assert other_worker.stats()["hits"] == 5
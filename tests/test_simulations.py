@@ -0,0 +1,25 @@
+import json
+import main
+import simulations
+
+
+def test_unseeded_runs_return_a_seed_json_numbers_can_hold():
+    result = simulations.simulate("heads-or-tails", 1000)
+    assert 0 <= result["seed"] < 2 ** 53
+    assert float(json.loads(json.dumps(result["seed"]))) == result["seed"]
+    assert simulations.simulate("heads-or-tails", 1000, seed=result["seed"])["outcomes"] == result["outcomes"]
+
+
+def test_seeds_beyond_double_precision_are_rejected():
+    client = main.app.test_client()
+    response = client.post("/api/simulate/heads-or-tails", json={"rounds": 10, "seed": 2 ** 53})
+    assert response.status_code == 400
+    assert client.post("/api/simulate/heads-or-tails", json={"rounds": 10, "seed": 2 ** 53 - 1}).status_code == 200
+
+
+def test_body_that_is_not_an_object_is_rejected():
+    client = main.app.test_client()
+    for body in ([1], 3, "x", None):
+        response = client.post("/api/simulate/rock-paper-scissors", json=body)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import main
+
+
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures_left = 0
+    client_ports = []
+
+    def do_GET(self):
+        Upstream.client_ports.append(self.client_address[1])
+        status = 503 if Upstream.failures_left else 200
+        Upstream.failures_left = max(0, Upstream.failures_left - 1)
+        body = json.dumps({"ok": status == 200}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream_url(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Upstream.failures_left = 0
+    Upstream.client_ports = []
+    monkeypatch.setattr(main, "upstream_session", None)
+    monkeypatch.setattr(main, "UPSTREAM_BACKOFF_FACTOR", 0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_session_is_shared_and_keeps_connections_alive(upstream_url):
+    for _ in range(3):
+        assert main.upstream_request("GET", upstream_url).json() == {"ok": True}
+    assert main.get_upstream_session() is main.get_upstream_session()
+    assert len(set(Upstream.client_ports)) == 1
+
+
+def test_retryable_statuses_are_retried(upstream_url):
+    Upstream.failures_left = main.UPSTREAM_MAX_RETRIES
+    response = main.upstream_request("GET", upstream_url)
+    assert response.status_code == 200
+    assert len(Upstream.client_ports) == main.UPSTREAM_MAX_RETRIES + 1
+
+
+def test_endpoints_get_their_own_timeouts(monkeypatch):
+    sent = {}
+
+    class Session:
+        def request(self, **kwargs):
+            sent.update(kwargs)
+
+    monkeypatch.setattr(main, "upstream_session", Session())
+    main.upstream_request("GET", main.GENDERIZE_API_ENDPOINT)
+    assert sent["timeout"] == main.UPSTREAM_TIMEOUTS[main.GENDERIZE_API_ENDPOINT]
+    main.upstream_request("GET", "http://unknown.example/")
+    assert sent["timeout"] == main.UPSTREAM_DEFAULT_TIMEOUT
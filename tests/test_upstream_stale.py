@@ -0,0 +1,54 @@
+import json
+import pytest
+import main
+from flask import g
+
+
+@pytest.fixture
+def upstream_down(monkeypatch):
+    def failing_fetch(*args, **kwargs):
+        raise main.requests.ConnectionError("down")
+
+    monkeypatch.setattr(main, "fetch_upstream_json", failing_fetch)
+
+
+def cache_expired(method, url, params, data):
+    main.upstream_cache.set(main.upstream_cache_key(method, url, params), data, -1)
+
+
+def test_name_insights_reports_stale_answers_from_worker_threads(upstream_down):
+    cache_expired("GET", main.GENDERIZE_API_ENDPOINT, {"name[]": ["Stale"]}, [{"name": "Stale", "gender": "female", "probability": 0.9}])
+    cache_expired("GET", main.AGEIFY_API_ENDPOINT, {"name[]": ["Stale"]}, [{"name": "Stale", "age": 40}])
+    response = main.app.test_client().post("/api/name-insights", json={"names": ["Stale"]})
+    assert response.status_code == 200
+    assert response.get_json()["stale"] is True
+    assert response.get_json()["results"] == [{"name": "Stale", "gender": "female", "probability": 0.9, "age": 40}]
+
+
+def test_bulk_workout_log_marks_stale_records(upstream_down):
+    main.upstream_cache.set(main.upstream_cache_key("POST", main.NUTRITIONIX_ENDPOINT, None, {
+        "query": "ran 3 miles", "weight_kg": 68, "height_cm": 177, "age": 30
+    }), {"exercises": [{"name": "running", "nf_calories": 300, "duration_min": 30, "met": 9.8}]}, -1)
+    response = main.app.test_client().post(
+        "/api/bulk/workout-log", data='{"weight": 150, "height_feet": 5, "height_inches": 10, "age": 30, "query": "ran 3 miles"}\n',
+        content_type="application/x-ndjson"
+    )
+    record = json.loads(response.get_data(as_text=True))
+    assert record["exercise"] == "running"
+    assert record["stale"] is True
+
+
+def test_stale_forecast_is_not_memoized(upstream_down):
+    latitude, longitude = 12.3456, 65.4321
+    key = (round(latitude, main.FORECAST_COORDINATE_DECIMALS), round(longitude, main.FORECAST_COORDINATE_DECIMALS))
+    params = {"lat": key[0], "lon": key[1], "appid": main.OPENWEATHERMAP_API_KEY, "units": "imperial", "cnt": 8}
+    forecast = {"city": {"timezone": 0}, "list": [{
+        "dt": 0, "weather": [{"main": "Clear", "description": "clear sky"}],
+        "main": {"temp": 70, "feels_like": 70, "temp_min": 65, "temp_max": 75, "humidity": 40}, "wind": {"speed": 3}
+    }]}
+    cache_expired("GET", main.OPENWEATHERMAP_API_ENDPOINT, params, forecast)
+    with main.app.test_request_context():
+        rows = main.get_forecast_rows(latitude, longitude)
+        assert g.upstream_stale is True
+    assert rows[0].weather == "Clear"
+    assert key not in main.forecast_memory